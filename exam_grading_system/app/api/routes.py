@@ -1,23 +1,24 @@
+import asyncio
 import json
 import os
-import shutil
 from datetime import datetime
-from fastapi import APIRouter, UploadFile, File, Form, HTTPException, BackgroundTasks
-import fitz
-from PIL import Image
-import io
+from typing import List, Optional
+from fastapi import APIRouter, UploadFile, File, Form, HTTPException, Query
+from fastapi.responses import StreamingResponse
 from bson import ObjectId
-import re
 
 from app.core.config import settings
 from app.core.database import get_database
-from app.services.ocr_service import OCRService
-from app.services.tesseract_service import TesseractService
-from app.services.paddle_service import PaddleService
-from app.services.qwen_service import QwenService
-from app.services.surya_service import SuryaService
-from app.services.image_processing import preprocess_handwriting
-from app.services.parser_service import parse_question_paper, parse_answer_sheet
+from app.core.events import event_bus, FINAL_STAGES
+from app.core.executor import run_in_thread
+from app.core.job_queue import PermanentJobError, new_job_fields, queue_stats, requeue_job
+from app.core.metrics import CACHE_LOOKUPS
+from app.services.cascade import resolve_engine
+from app.services.document_processor import reset_pages_update, selected_pages
+from app.services.ocr_cache import document_settings_key, ocr_cache
+from app.services.result_index import result_index
+from app.services.result_store import result_store
+from app.services.upload_store import UploadRejected, save_batch, save_upload
 
 router = APIRouter()
 
@@ -47,195 +48,357 @@ def _collect_pdf_entries():
     return question_files, answer_files
 
 
-def _save_result_to_file(doc_id: str, payload: dict):
-    """Persist OCR result to a JSON file in the results directory with meaningful name."""
-    # Fix timestamp to local timezone
-    payload.setdefault("doc_id", doc_id)
-    now = datetime.now().astimezone()
-    # Use ISO 8601 with timezone so the frontend can reliably parse local time
-    payload.setdefault("timestamp", now.isoformat())
-    
-    # Generate filename from extracted text or use doc_id
-    file_name = f"{doc_id}.json"
-    
-    # Try to extract meaningful name from parsed result or filename
-    if "parsed_result" in payload and payload["parsed_result"]:
-        try:
-            # Get first question or text snippet
-            if isinstance(payload["parsed_result"], list) and len(payload["parsed_result"]) > 0:
-                first_item = payload["parsed_result"][0]
-                if isinstance(first_item, dict) and "text" in first_item:
-                    text = first_item["text"][:30]  # First 30 chars
-                    # Sanitize filename
-                    safe_name = re.sub(r'[<>:"/\\|?*]', '', text).strip()
-                    if safe_name:
-                        file_name = f"{safe_name}_{now.strftime('%Y%m%d_%H%M%S')}.json"
-        except Exception as e:
-            print(f"Could not generate name from content: {e}")
-    
-    # Fallback to filename if provided
-    if file_name == f"{doc_id}.json" and "filename" in payload:
-        try:
-            base_name = os.path.splitext(payload["filename"])[0][:30]
-            safe_name = re.sub(r'[<>:"/\\|?*]', '', base_name).strip()
-            if safe_name:
-                file_name = f"{safe_name}_{now.strftime('%Y%m%d_%H%M%S')}.json"
-        except Exception as e:
-            print(f"Could not use filename: {e}")
-    
-    result_path = os.path.join(settings.RESULTS_DIR, file_name)
-
+def _parse_page_range(pages: str):
+    """Parse a 1-based page range ("3" or "2-5") into [first, last]."""
     try:
-        with open(result_path, "w", encoding="utf-8") as result_file:
-            json.dump(payload, result_file, ensure_ascii=False, indent=2)
-    except Exception as exc:
-        print(f"Failed to persist result {doc_id}: {exc}")
+        first, _, last = pages.partition("-")
+        first = int(first)
+        last = int(last) if last else first
+    except ValueError:
+        raise HTTPException(status_code=400, detail="pages must look like '3' or '2-5'")
+    if first < 1 or last < first:
+        raise HTTPException(status_code=400, detail="pages must be a 1-based, increasing range")
+    return [first, last]
+
+
+async def _find_cached_documents(db, content_hashes, doc_type, ocr_engine, page_range=None):
+    """
+    Map each content hash to the id of a completed document with the same content, type, engine
+    and page range, processed with the same settings (see document_settings_key()).
+    """
+    cursor = db.documents.find(
+        {
+            "content_hash": {"$in": list(set(content_hashes))},
+            "doc_type": doc_type,
+            "ocr_engine": ocr_engine,
+            "page_range": page_range,
+            "cache_version": settings.OCR_CACHE_VERSION,
+            "settings_key": document_settings_key(ocr_engine, doc_type),
+            "status": "completed",
+        },
+        {"_id": 1, "content_hash": 1},
+    )
+    return {doc["content_hash"]: str(doc["_id"]) async for doc in cursor}
+
+
+async def _queue_documents(saved, doc_type, ocr_engine, use_cache, page_range=None):
+    """
+    Creates the DB records for saved uploads; one insert_many puts every job on the queue.
+    Documents already processed the same way are answered from the document cache instead.
+    Returns {"id", "filename", "status"[, "cached"]} per upload, in order.
+    """
+    # Stored resolved, so unknown names are cached, listed and processed as the engine that runs them
+    ocr_engine = resolve_engine(ocr_engine)
+    db = await get_database()
+    cached = {}
+    if use_cache and settings.OCR_CACHE_ENABLED and saved:
+        cached = await _find_cached_documents(
+            db, [entry["content_hash"] for entry in saved], doc_type, ocr_engine, page_range
+        )
+        for entry in saved:
+            hit = entry["content_hash"] in cached
+            ocr_cache.record_document_lookup(hit)
+            CACHE_LOOKUPS.inc(level="document", result="hit" if hit else "miss")
+
+    now = datetime.utcnow()
+    settings_key = document_settings_key(ocr_engine, doc_type)
+    new_docs = [
+        {
+            "filename": entry["filename"],
+            "doc_type": doc_type,
+            "ocr_engine": ocr_engine,
+            "page_range": page_range,
+            "status": "queued",
+            "parsed_result": None,
+            "content_hash": entry["content_hash"],
+            "cache_version": settings.OCR_CACHE_VERSION,
+            "settings_key": settings_key,
+            "upload_timestamp": now,
+            **new_job_fields(entry["path"], use_cache),
+        }
+        for entry in saved
+        if entry["content_hash"] not in cached
+    ]
+    inserted_ids = iter((await db.documents.insert_many(new_docs)).inserted_ids if new_docs else [])
+
+    results = []
+    for entry in saved:
+        cached_id = cached.get(entry["content_hash"])
+        if cached_id:
+            results.append({"id": cached_id, "filename": entry["filename"], "status": "completed", "cached": True})
+        else:
+            results.append({"id": str(next(inserted_ids)), "filename": entry["filename"], "status": "queued"})
+    return results
 
 
-async def process_document_task(doc_id: str, file_path: str, doc_type: str, ocr_engine: str):
-    """Background task to handle heavy OCR logic and result persistence."""
-    db = await get_database()
+@router.post("/upload")
+async def upload_document(
+    file: UploadFile = File(...),
+    doc_type: str = Form(...),  # 'question_paper' or 'answer_sheet'
+    ocr_engine: str = Form(...),  # 'gemini', 'tesseract', 'tesserocr', 'paddle', 'qwen', 'surya' or 'cascade'
+    use_cache: bool = Form(True),  # False forces a fresh OCR run
+    pages: Optional[str] = Form(None)  # only process these 1-based pages, e.g. "3" or "2-5"
+):
+    """Upload and queue a document for OCR processing."""
+    page_range = _parse_page_range(pages) if pages else None
 
+    # 1. Stream the file to disk under a content-derived name (hashed on the way)
+    saved = await save_upload(file)
+
+    # 2. Queue it, unless it was already processed the same way
+    result = (await _queue_documents([saved], doc_type, ocr_engine, use_cache, page_range))[0]
+    result.pop("filename")
+    return result
+
+
+@router.post("/upload/batch")
+async def upload_batch(
+    files: List[UploadFile] = File(...),  # PDFs and/or ZIP archives of PDFs
+    doc_type: str = Form(...),
+    ocr_engine: str = Form(...),
+    use_cache: bool = Form(True),
+    pages: Optional[str] = Form(None)  # same page range for every document
+):
+    """Upload many documents at once (e.g. a class set of answer sheets) and queue them all."""
+    page_range = _parse_page_range(pages) if pages else None
     try:
-        # 1. Convert PDF to Images
-        doc = fitz.open(file_path)
-        images = []
-        for page_num in range(len(doc)):
-            page = doc.load_page(page_num)
-            pix = page.get_pixmap()
-            img_bytes = pix.tobytes()
-            img = Image.open(io.BytesIO(img_bytes))
-            images.append(img)
-        doc.close()
-
-        # Choose OCR Engine
-        if ocr_engine == 'gemini':
-            ocr_service = OCRService()
-        elif ocr_engine == 'paddle':
-            ocr_service = PaddleService()
-        elif ocr_engine == 'qwen':
-            ocr_service = QwenService()
-        elif ocr_engine == 'surya':
-            ocr_service = SuryaService()
-        else:
-            ocr_service = TesseractService()
+        saved = await save_batch(files)
+    except UploadRejected as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if not saved:
+        raise HTTPException(status_code=400, detail="No PDF documents found in the upload")
+
+    documents = await _queue_documents(saved, doc_type, ocr_engine, use_cache, page_range)
+    return {
+        "count": len(documents),
+        "queued": sum(1 for doc in documents if doc["status"] == "queued"),
+        "documents": documents,
+    }
 
-        all_raw_text = []
 
-        # 2. Iterate pages
-        for i, image in enumerate(images):
-            # Save temp image
-            temp_img_path = os.path.join(settings.UPLOAD_DIR, f"{doc_id}_page_{i}.png")
-            image.save(temp_img_path, 'PNG')
+@router.get("/cache/stats")
+async def get_cache_stats():
+    """Hit/miss counters and size of the OCR result cache."""
+    return await run_in_thread(ocr_cache.stats)
 
-            final_path_to_ocr = temp_img_path
 
-            # 3. Pre-process if Handwritten Answer Sheet
-            if doc_type == "answer_sheet" and ocr_engine != 'paddle':
-                # Removes lines, increases contrast
-                final_path_to_ocr = preprocess_handwriting(temp_img_path)
+def _object_id(doc_id: str):
+    if not ObjectId.is_valid(doc_id):
+        raise HTTPException(status_code=404, detail="Document not found")
+    return ObjectId(doc_id)
 
-            # 4. Run OCR
-            page_text, _ = ocr_service.extract_text(final_path_to_ocr)
-            all_raw_text.append(page_text)
 
-            # Cleanup temp images
-            # os.remove(temp_img_path)
+def _page_slice(pages: str):
+    """Parse a 1-based page range ("3" or "2-5") into a Mongo $slice of raw_text_pages."""
+    first, last = _parse_page_range(pages)
+    return {"$slice": [first - 1, last - first + 1]}
 
-        # 5. Parse Data based on document type
-        full_text_lines = "\n".join(all_raw_text).split("\n")
 
-        if doc_type == "question_paper":
-            parsed_data = parse_question_paper(full_text_lines)
-        else:
-            parsed_data = parse_answer_sheet(full_text_lines)
+# Small fields needed to track progress; polling should never pull OCR text
+STATUS_FIELDS = {"status": 1, "filename": 1, "doc_type": 1, "ocr_engine": 1,
+                 "queue_state": 1, "enqueued_at": 1, "attempts": 1, "error": 1}
+# Heavy fields left out of listings
+LISTING_FIELDS = {"status": 1, "filename": 1, "doc_type": 1, "ocr_engine": 1, "upload_timestamp": 1}
 
-        parsed_payload = [q.dict() for q in parsed_data]
-        result_payload = {
-            "filename": os.path.basename(file_path),
-            "doc_type": doc_type,
-            "ocr_engine": ocr_engine,
-            "status": "completed",
-            "parsed_result": parsed_payload,
-            "raw_text_pages": all_raw_text,
-        }
 
-        # Save result to file
-        _save_result_to_file(doc_id, result_payload)
-
-        # 6. Update DB
-        await db.documents.update_one(
-            {"_id": ObjectId(doc_id)},
-            {
-                "$set": {
-                    "status": "completed",
-                    "parsed_result": parsed_payload,
-                    "raw_text_pages": all_raw_text
-                }
-            }
-        )
+@router.get("/results/{doc_id}/status")
+async def get_result_status(doc_id: str):
+    """Lightweight status for polling: no parsed result or page text."""
+    db = await get_database()
+    doc = await db.documents.find_one({"_id": _object_id(doc_id)}, STATUS_FIELDS)
 
-    except Exception as e:
-        print(f"Error processing {doc_id}: {e}")
-        failure_payload = {
-            "filename": os.path.basename(file_path),
-            "doc_type": doc_type,
-            "ocr_engine": ocr_engine,
-            "status": "failed",
-            "error": str(e),
-        }
-        _save_result_to_file(doc_id, failure_payload)
-        await db.documents.update_one(
-            {"_id": ObjectId(doc_id)},
-            {"$set": {"status": "failed"}}
-        )
+    if not doc:
+        raise HTTPException(status_code=404, detail="Document not found")
 
+    if doc.get("status") in ("queued", "processing"):
+        doc["queue"] = await queue_stats(doc)
 
-@router.post("/upload")
-async def upload_document(
-    background_tasks: BackgroundTasks,
-    file: UploadFile = File(...),
-    doc_type: str = Form(...),  # 'question_paper' or 'answer_sheet'
-    ocr_engine: str = Form(...)  # 'gemini', 'tesseract', 'paddle', 'qwen', 'surya'
-):
-    """Upload and queue a document for OCR processing."""
-    # 1. Save file locally
-    file_location = os.path.join(settings.UPLOAD_DIR, file.filename)
-    with open(file_location, "wb") as buffer:
-        shutil.copyfileobj(file.file, buffer)
+    doc["_id"] = str(doc["_id"])
+    return doc
 
-    # 2. Create Initial DB Record
-    db = await get_database()
-    new_doc = {
-        "filename": file.filename,
-        "doc_type": doc_type,
-        "ocr_engine": ocr_engine,
-        "status": "processing",
-        "parsed_result": None
-    }
-    result = await db.documents.insert_one(new_doc)
-    doc_id = str(result.inserted_id)
 
-    # 3. Trigger Background Processing
-    background_tasks.add_task(process_document_task, doc_id, file_location, doc_type, ocr_engine)
+def _sse(event):
+    return f"event: {event['stage']}\ndata: {json.dumps(event, default=str)}\n\n"
+
+
+def _final_event(doc_id, doc):
+    """
+    Completion/failure event for a document already finished (or None while it is not);
+    "not_found" once the document has been deleted.
+    """
+    if doc is None:
+        return {"doc_id": doc_id, "stage": "not_found"}
+    status = doc.get("status")
+    if status not in FINAL_STAGES:
+        return None
+    event = {"doc_id": doc_id, "stage": status}
+    if doc.get("error"):
+        event["error"] = doc["error"]
+    return event
+
+
+@router.get("/results/{doc_id}/events")
+async def stream_result_events(doc_id: str):
+    """
+    Server-Sent Events stream of a document's progress:
+    rasterized / preprocessed / ocr_done per page, then parsed, persisted and completed (or failed).
+    The stream ends after the final event.
+    """
+    object_id = _object_id(doc_id)
+    db = await get_database()
+    if not await db.documents.find_one({"_id": object_id}, {"_id": 1}):
+        raise HTTPException(status_code=404, detail="Document not found")
 
-    return {"id": doc_id, "status": "queued"}
+    async def events():
+        with event_bus.subscribe(doc_id) as queue:
+            # Subscribed before reading the status, so a completion in between is not missed
+            doc = await db.documents.find_one({"_id": object_id}, STATUS_FIELDS)
+            final = _final_event(doc_id, doc)
+            if final:
+                yield _sse(final)
+                return
+            yield _sse({"doc_id": doc_id, "stage": doc.get("status", "queued")})
+
+            while True:
+                try:
+                    event = await asyncio.wait_for(queue.get(), settings.EVENTS_KEEPALIVE_INTERVAL)
+                except asyncio.TimeoutError:
+                    # Jobs run by a standalone worker publish in another process; fall back to the DB
+                    doc = await db.documents.find_one({"_id": object_id}, STATUS_FIELDS)
+                    final = _final_event(doc_id, doc)
+                    if final:
+                        yield _sse(final)
+                        return
+                    yield ": keep-alive\n\n"
+                    continue
+                yield _sse(event)
+                if event["stage"] in FINAL_STAGES:
+                    return
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
 
 @router.get("/results/{doc_id}")
-async def get_results(doc_id: str):
-    """Retrieve OCR results for a specific document."""
+async def get_results(
+    doc_id: str,
+    fields: Optional[str] = None,  # comma-separated top-level fields, e.g. "status,parsed_result"
+    pages: Optional[str] = None,  # 1-based slice of raw_text_pages, e.g. "1-5"
+):
+    """Retrieve OCR results for a specific document, optionally projected and page-sliced."""
+    projection = None
+    hidden = []
+    if fields:
+        projection = {name.strip(): 1 for name in fields.split(",") if name.strip()}
+        # queue_stats() needs the queue fields; fetched here but only returned when asked for
+        hidden = [name for name in ("queue_state", "enqueued_at") if name not in projection]
+        projection.setdefault("status", 1)
+        projection.update({name: 1 for name in hidden})
+    if pages:
+        # With an inclusion projection the slice only applies if raw_text_pages is requested
+        if projection is None or "raw_text_pages" in projection:
+            projection = projection or {}
+            projection["raw_text_pages"] = _page_slice(pages)
+
     db = await get_database()
-    doc = await db.documents.find_one({"_id": ObjectId(doc_id)})
+    doc = await db.documents.find_one({"_id": _object_id(doc_id)}, projection)
 
     if not doc:
         raise HTTPException(status_code=404, detail="Document not found")
 
+    if doc.get("status") in ("queued", "processing"):
+        doc["queue"] = await queue_stats(doc)
+    for name in hidden:
+        doc.pop(name, None)
+
     # Convert ObjectId to str for JSON response
     doc["_id"] = str(doc["_id"])
     return doc
 
 
+@router.post("/results/{doc_id}/resume")
+async def resume_document(
+    doc_id: str,
+    pages: Optional[str] = Form(None),  # 1-based pages to OCR again although they are done, e.g. "37"
+    use_cache: bool = Form(True)  # False so the re-read pages are not answered from the OCR cache
+):
+    """
+    Queue a failed (or completed) document again. Finished pages are checkpointed, so only the
+    missing and failed pages are processed, plus `pages` when given (e.g. to correct one bad page).
+    """
+    object_id = _object_id(doc_id)
+    db = await get_database()
+    doc = await db.documents.find_one({"_id": object_id},
+                                      {"file_path": 1, "page_range": 1, "raw_text_pages": 1})
+    if not doc:
+        raise HTTPException(status_code=404, detail="Document not found")
+    if not doc.get("file_path"):
+        raise HTTPException(status_code=400, detail="The uploaded file of this document is not available")
+
+    # Checkpoints exist once a run has started, one entry per PDF page; without them every page runs anyway
+    texts = doc.get("raw_text_pages") if isinstance(doc.get("raw_text_pages"), list) else None
+    redo = []
+    if pages:
+        first, last = _parse_page_range(pages)
+        if texts is not None:
+            redo = list(range(first - 1, min(last, len(texts))))
+
+    if not await requeue_job(doc_id, use_cache, reset_pages_update(redo)):
+        raise HTTPException(status_code=409, detail="Document is already queued or processing")
+
+    pending = None
+    if texts is not None:
+        try:
+            wanted = selected_pages(len(texts), doc.get("page_range"))
+        except PermanentJobError:
+            wanted = []
+        pending = [i + 1 for i in wanted if texts[i] is None or i in redo]
+    return {"id": doc_id, "status": "queued", "pending_pages": pending}
+
+
+@router.get("/documents")
+async def list_documents(
+    limit: int = Query(50, ge=1, le=500),
+    cursor: Optional[str] = None,  # _id of the last document on the previous page
+    status: Optional[str] = None,
+    doc_type: Optional[str] = None,
+    engine: Optional[str] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+):
+    """List documents newest first, without their OCR payloads (served by the startup indexes)."""
+    query = {}
+    if status:
+        query["status"] = status
+    if doc_type:
+        query["doc_type"] = doc_type
+    if engine:
+        query["ocr_engine"] = engine
+
+    # Date ranges use the upload_timestamp index; the cursor is a range on _id
+    time_range = {}
+    if since:
+        time_range["$gte"] = since
+    if until:
+        time_range["$lte"] = until
+    if time_range:
+        query["upload_timestamp"] = time_range
+    if cursor:
+        query["_id"] = {"$lt": _object_id(cursor)}
+
+    db = await get_database()
+    docs = await db.documents.find(query, LISTING_FIELDS).sort("_id", -1).limit(limit + 1).to_list(limit + 1)
+
+    next_cursor = str(docs[limit - 1]["_id"]) if len(docs) > limit else None
+    docs = docs[:limit]
+    for doc in docs:
+        doc["_id"] = str(doc["_id"])
+    return {"documents": docs, "next_cursor": next_cursor}
+
+
 @router.get("/question-papers")
 async def list_question_papers():
     """List all available question paper PDFs."""
@@ -251,51 +414,46 @@ async def list_answer_sheets():
 
 
 @router.get("/saved-results")
-async def list_saved_results():
-    """List all saved OCR results from the results directory."""
-    results_dir = settings.RESULTS_DIR
-    files = []
-
-    if os.path.isdir(results_dir):
-        for name in sorted(os.listdir(results_dir), reverse=True):  # Most recent first
-            if name.lower().endswith(".json"):
-                file_path = os.path.join(results_dir, name)
-                try:
-                    with open(file_path, "r", encoding="utf-8") as f:
-                        data = json.load(f)
-                    
-                    # Clean up filename for display
-                    display_name = name.replace(".json", "")
-                    
-                    files.append({
-                        "id": name,  # Use full filename as ID for retrieval
-                        "name": display_name,
-                        "url": f"/api/saved-results/{name}",
-                        "status": data.get("status", "unknown"),
-                        "doc_type": data.get("doc_type", ""),
-                        "timestamp": data.get("timestamp", ""),
-                    })
-                except Exception as e:
-                    print(f"Error reading result file {name}: {e}")
-
-    return {"files": files}
+async def list_saved_results(
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = None,
+    status: Optional[str] = None,
+    doc_type: Optional[str] = None,
+    engine: Optional[str] = None,
+    since: Optional[str] = None,  # ISO 8601 timestamps
+    until: Optional[str] = None,
+):
+    """List saved OCR results, newest first, from the metadata index (cursor-paginated)."""
+    try:
+        rows, next_cursor = await run_in_thread(
+            result_index.query, limit, cursor, status, doc_type, engine, since, until
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    counts = await run_in_thread(result_index.status_counts)
+
+    files = [
+        {
+            "id": row["id"],  # doc_id (or an older result's file name), used for retrieval
+            "name": row["name"],
+            "url": f"/api/saved-results/{row['id']}",
+            "status": row["status"],
+            "doc_type": row["doc_type"],
+            "ocr_engine": row["ocr_engine"],
+            "timestamp": row["timestamp"],
+        }
+        for row in rows
+    ]
+    return {"files": files, "next_cursor": next_cursor, "counts": counts}
 
 
 @router.get("/saved-results/{result_id}")
 async def get_saved_result(result_id: str):
-    """Retrieve a specific saved OCR result."""
-    # result_id now includes .json extension
-    if not result_id.endswith(".json"):
-        result_id = result_id + ".json"
-    
-    result_file = os.path.join(settings.RESULTS_DIR, result_id)
-
-    if not os.path.isfile(result_file):
-        raise HTTPException(status_code=404, detail="Result not found")
-
+    """Retrieve a specific saved OCR result by doc_id (or by the file name of an older result)."""
     try:
-        with open(result_file, "r", encoding="utf-8") as f:
-            data = json.load(f)
-        return data
+        data = await run_in_thread(result_store.load, result_id)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error reading result: {str(e)}")
+    if data is None:
+        raise HTTPException(status_code=404, detail="Result not found")
+    return data
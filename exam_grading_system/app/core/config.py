@@ -1,5 +1,5 @@
 import os
-from typing import List
+from typing import Dict, List, Optional
 from pydantic_settings import BaseSettings
 
 class Settings(BaseSettings):
@@ -18,13 +18,158 @@ class Settings(BaseSettings):
     # OpenRouter API Key for Qwen
     OPENROUTER_API_KEY: str = os.getenv("OPENROUTER_API_KEY", "")
 
+    # Remote engine endpoints (point at a local stub server for testing)
+    OPENROUTER_BASE_URL: str = "https://openrouter.ai/api/v1"
+    GEMINI_BASE_URL: str = "https://generativelanguage.googleapis.com"
+
     # Tesseract Command Path
     TESSERACT_CMD: str = os.getenv("TESSERACT_CMD", r"C:\Program Files\Tesseract-OCR\tesseract.exe")
+    TESSERACT_LANG: str = "eng"
+    # tessdata directory for the in-process "tesserocr" engine (None uses libtesseract's default)
+    TESSDATA_PREFIX: Optional[str] = os.getenv("TESSDATA_PREFIX")
 
     UPLOAD_DIR: str = os.path.join(os.getcwd(), "uploads")
     PDF_DIR: str = os.path.join(os.getcwd(), "pdf")
     ANSWER_SHEET_FILES: List[str] = ["eng_1.pdf"]
     RESULTS_DIR: str = os.path.join(os.getcwd(), "results")
+    CACHE_DIR: str = os.path.join(os.getcwd(), "cache")
+    # Result files are compact JSON named <doc_id>.json; gzip them (<doc_id>.json.gz) to save disk
+    RESULTS_GZIP: bool = False
+    RESULTS_GZIP_LEVEL: int = 6
+
+    # OCR engines loaded at startup and kept warm for the life of the worker
+    ENGINE_PRELOAD: List[str] = []
+    # Extra engines as name -> "module:Class"; like the built-in ones they are imported on first use
+    ENGINE_PLUGINS: Dict[str, str] = {}
+    # Seconds an engine may sit unused before it is unloaded (0 keeps engines loaded forever)
+    ENGINE_IDLE_TIMEOUT: int = 0
+
+    # Worker pools: CPU-bound engines run in a shared process pool, I/O-bound ones in a thread pool,
+    # and "dedicated" model engines in a process pool of their own sized to ENGINE_PAGE_PARALLELISM,
+    # so their models are not loaded again in every process of the shared pool
+    OCR_PROCESS_WORKERS: int = max(1, (os.cpu_count() or 2) // 2)  # 0 runs CPU work in threads
+    OCR_THREAD_WORKERS: int = 16
+    PROCESS_START_METHOD: str = "spawn"
+    ENGINE_EXECUTORS: Dict[str, str] = {
+        "tesseract": "process",
+        "tesserocr": "thread",  # keeps a Tesseract handle per thread and releases the GIL while recognizing
+        "paddle": "dedicated",
+        "surya": "dedicated",
+        "gemini": "thread",
+        "qwen": "thread",
+    }
+
+    # Remote engine HTTP client: pooled connections, per-engine concurrency and rate limits, retries
+    REMOTE_TIMEOUT: float = 120.0
+    REMOTE_MAX_RETRIES: int = 4
+    REMOTE_BACKOFF_BASE: float = 1.0  # seconds, doubled per attempt and jittered
+    REMOTE_BACKOFF_MAX: float = 30.0
+    REMOTE_MAX_CONCURRENCY: Dict[str, int] = {"gemini": 8, "qwen": 8}
+    REMOTE_RATE_LIMITS: Dict[str, float] = {"gemini": 2.0, "qwen": 2.0}  # requests/second, 0 disables
+    REMOTE_BURST: Dict[str, int] = {"gemini": 4, "qwen": 4}
+
+    # Pages per engine call for engines with a batch API; e.g. {"tesserocr": 8} hands Tesseract several
+    # pages of a document per call instead of one call per page
+    ENGINE_BATCH_SIZES: Dict[str, int] = {"surya": 8}
+    # Optional Surya-internal batch sizes (None uses Surya's defaults)
+    SURYA_DETECTION_BATCH_SIZE: Optional[int] = None
+    SURYA_RECOGNITION_BATCH_SIZE: Optional[int] = None
+
+    # Write rendered and preprocessed page images to UPLOAD_DIR (pages are otherwise handled in memory)
+    DEBUG_SAVE_PAGES: bool = False
+
+    # How pages are rendered for each engine, applied once by MuPDF at render time:
+    #   dpi          render resolution
+    #   grayscale    render a single channel instead of RGB
+    #   max_edge     cap on the longest side in pixels (0 = no cap); lowers the effective dpi
+    #   jpeg_quality JPEG quality of the upload, for remote engines
+    # Engines without an entry use DEFAULT_RENDER_PROFILE; missing keys fall back to it too
+    DEFAULT_RENDER_PROFILE: dict = {"dpi": 72, "grayscale": False, "max_edge": 0, "jpeg_quality": 85}
+    RENDER_PROFILES: Dict[str, dict] = {
+        "tesseract": {"dpi": 300, "grayscale": True, "max_edge": 4000},
+        "tesserocr": {"dpi": 300, "grayscale": True, "max_edge": 4000},
+        "paddle": {"dpi": 200, "grayscale": False, "max_edge": 3000},  # PaddleOCR works best under 3000px
+        "surya": {"dpi": 192, "grayscale": False, "max_edge": 2048},
+        "gemini": {"dpi": 150, "grayscale": True, "max_edge": 2048, "jpeg_quality": 85},
+        "qwen": {"dpi": 150, "grayscale": True, "max_edge": 1600, "jpeg_quality": 85},
+    }
+
+    # Cascade mode (ocr_engine "cascade"): every page goes to the cheap primary engine first and only
+    # weak pages - mean confidence below CASCADE_MIN_CONFIDENCE (0-100) or fewer than CASCADE_MIN_CHARS
+    # characters - are sent again to the fallback engine
+    CASCADE_PRIMARY_ENGINE: str = "tesseract"
+    CASCADE_FALLBACK_ENGINE: str = "gemini"
+    CASCADE_MIN_CONFIDENCE: float = 70.0
+    CASCADE_MIN_CHARS: int = 20
+
+    # Answer-sheet preprocessing (ruled-line removal)
+    PREPROCESS_DESKEW: bool = True
+    DESKEW_MIN_ANGLE: float = 0.1  # degrees; smaller estimated skews are left alone
+    RULED_LINE_MIN_COVERAGE: float = 0.3  # share of a row's width that must be ink for it to count as a ruled line
+    PREPROCESS_WORK_SIZE: int = 1200  # longest side of the low-res copy used for skew and line detection
+    PREPROCESS_TILE_HEIGHT: int = 4096  # pages taller than this are processed in strips on several threads
+    PREPROCESS_THREADS: int = 4
+    OPENCV_THREADS: Optional[int] = None  # cv2.setNumThreads(); None keeps OpenCV's default
+
+    # Pre-OCR content check on a downscaled copy of each rendered page (ink clearly darker than the
+    # paper, grouped into connected components; ruled lines, specks and scanner edges ignored):
+    # blank pages skip OCR entirely and mostly empty pages are cropped to their content
+    SKIP_BLANK_PAGES: bool = True
+    CROP_TO_CONTENT: bool = True
+    CONTENT_WORK_SIZE: int = 1000  # longest side of the downscaled copy
+    CONTENT_INK_CONTRAST: int = 40  # how much darker than the paper (0-255) a pixel must be to count as ink
+    CONTENT_MIN_COMPONENT_AREA: int = 3  # smaller ink specks (downscaled pixels) are noise
+    BLANK_MAX_INK_RATIO: float = 0.0001  # pages with less text-like ink than this share of their area are blank
+    CROP_MAX_AREA_RATIO: float = 0.6  # crop only when the content covers at most this share of the page
+    CROP_MARGIN: float = 0.02  # padding around the content, as a share of the page's longest side
+
+    # Born-digital pages: take the PDF text layer instead of rendering and OCR'ing the page.
+    # A page qualifies with enough characters, nearly all in real fonts mapped to Unicode,
+    # and little of its area covered by images (scans carry their content as images)
+    TEXT_LAYER_FAST_PATH: bool = True
+    TEXT_LAYER_MIN_CHARS: int = 50
+    TEXT_LAYER_MIN_FONT_COVERAGE: float = 0.9
+    TEXT_LAYER_MAX_IMAGE_RATIO: float = 0.5
+
+    # Pages rendered ahead of OCR; bounds rasterization memory regardless of PDF length
+    RASTER_PREFETCH: int = 2
+
+    # OCR the pages of a document concurrently (False processes them strictly one by one)
+    PARALLEL_PAGES: bool = True
+    # Max pages in flight per engine across all documents: wide for Tesseract,
+    # narrow for CPU-only Paddle/Surya, bounded by provider rate limits for Gemini/Qwen
+    ENGINE_PAGE_PARALLELISM: Dict[str, int] = {
+        "tesseract": os.cpu_count() or 4,
+        "tesserocr": os.cpu_count() or 4,
+        "paddle": 1,
+        "surya": 1,
+        "gemini": 4,
+        "qwen": 4,
+    }
+
+    # Uploads: files are streamed to UPLOAD_DIR in chunks under content-derived names
+    UPLOAD_CHUNK_SIZE: int = 1024 * 1024
+    UPLOAD_CONCURRENCY: int = 8  # files of a batch written at once
+    BATCH_MAX_FILES: int = 1000  # documents per batch upload, archives included
+    ARCHIVE_MAX_UNCOMPRESSED_BYTES: int = 4 * 1024 ** 3
+
+    # Durable job queue (stored on the documents collection) and its workers
+    RUN_EMBEDDED_WORKER: bool = True  # also process jobs inside the API process
+    WORKER_CONCURRENCY: int = 2  # documents processed at once per worker process
+    JOB_VISIBILITY_TIMEOUT: int = 300  # seconds a lease lasts without a heartbeat
+    JOB_MAX_ATTEMPTS: int = 3
+    JOB_RETRY_BACKOFF: float = 10.0  # seconds before the first retry, doubled per attempt
+    JOB_POLL_INTERVAL: float = 1.0  # seconds between claims while the queue is empty
+
+    # Progress event streams: seconds between keep-alive comments, which also re-check the
+    # stored status (catches documents finished by a worker in another process)
+    EVENTS_KEEPALIVE_INTERVAL: float = 15.0
+
+    # Content-addressed OCR cache (page text keyed by pixels + engine + preprocessing)
+    OCR_CACHE_ENABLED: bool = True
+    OCR_CACHE_MAX_ENTRIES: int = 100_000
+    OCR_CACHE_TTL: int = 30 * 24 * 3600  # seconds, 0 never expires
+    OCR_CACHE_VERSION: str = "1"  # bump to invalidate every cached page and document
 
     class Config:
         env_file = ".env"
@@ -34,4 +179,5 @@ settings = Settings()
 # Ensure upload directory exists
 os.makedirs(settings.UPLOAD_DIR, exist_ok=True)
 os.makedirs(settings.PDF_DIR, exist_ok=True)
-os.makedirs(settings.RESULTS_DIR, exist_ok=True)
\ No newline at end of file
+os.makedirs(settings.RESULTS_DIR, exist_ok=True)
+os.makedirs(settings.CACHE_DIR, exist_ok=True)
\ No newline at end of file
@@ -1,4 +1,5 @@
 from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import ASCENDING, DESCENDING
 from app.core.config import settings
 
 class Database:
@@ -9,9 +10,24 @@ db = Database()
 async def get_database():
     return db.client[settings.DB_NAME]
 
+async def ensure_indexes():
+    """Create the indexes behind result polling, listing, the document cache and the job queue."""
+    documents = (await get_database()).documents
+    await documents.create_index([("status", ASCENDING), ("_id", DESCENDING)])
+    await documents.create_index([("doc_type", ASCENDING), ("_id", DESCENDING)])
+    await documents.create_index([("ocr_engine", ASCENDING), ("_id", DESCENDING)])
+    await documents.create_index([("upload_timestamp", DESCENDING)])
+    await documents.create_index([("content_hash", ASCENDING), ("doc_type", ASCENDING), ("ocr_engine", ASCENDING)])
+    await documents.create_index([("queue_state", ASCENDING), ("enqueued_at", ASCENDING)])
+    await documents.create_index([("queue_state", ASCENDING), ("lease_expires_at", ASCENDING)])
+
 async def connect_to_mongo():
     db.client = AsyncIOMotorClient(settings.MONGO_URL)
     print("Connected to MongoDB")
+    try:
+        await ensure_indexes()
+    except Exception as e:
+        print(f"Could not create MongoDB indexes: {e}")
 
 async def close_mongo_connection():
     db.client.close()
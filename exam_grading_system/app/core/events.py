@@ -0,0 +1,47 @@
+import asyncio
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+
+# Terminal stages: subscribers stop listening after one of these
+FINAL_STAGES = {"completed", "failed"}
+
+
+class EventBus:
+    """
+    In-process pub/sub of per-document progress events.
+    Each subscriber gets its own bounded queue; a slow subscriber loses its oldest events
+    rather than blocking the pipeline. Publish and subscribe from the event loop thread.
+    """
+
+    def __init__(self, max_queue=1000):
+        self.max_queue = max_queue
+        self._subscribers = defaultdict(set)
+
+    def publish(self, doc_id, stage, **data):
+        subscribers = self._subscribers.get(doc_id)
+        if not subscribers:
+            return
+        event = {"doc_id": doc_id, "stage": stage, "time": time.time(), **data}
+        for queue in subscribers:
+            if queue.full():
+                queue.get_nowait()
+            queue.put_nowait(event)
+
+    @contextmanager
+    def subscribe(self, doc_id, max_queue=None):
+        """
+        Yields a queue receiving every event published for doc_id while the block is active.
+        max_queue overrides the bus default; 0 means unbounded (for consumers that must see every event).
+        """
+        queue = asyncio.Queue(maxsize=self.max_queue if max_queue is None else max_queue)
+        self._subscribers[doc_id].add(queue)
+        try:
+            yield queue
+        finally:
+            self._subscribers[doc_id].discard(queue)
+            if not self._subscribers[doc_id]:
+                del self._subscribers[doc_id]
+
+
+event_bus = EventBus()
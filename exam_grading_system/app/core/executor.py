@@ -0,0 +1,146 @@
+import asyncio
+import functools
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from app.core.config import settings
+
+
+class Executors:
+    process_pool: ProcessPoolExecutor = None
+    thread_pool: ThreadPoolExecutor = None
+    engine_pools: dict = {}  # engine name -> ProcessPoolExecutor of its own ("dedicated" engines)
+    page_limiters: dict = {}
+
+
+executors = Executors()
+
+
+def _init_process_worker():
+    """Runs once in every pool process: warm the process-bound engines listed for preload."""
+    from app.services.engine_registry import engine_registry
+
+    engine_registry.preload(
+        [name for name in settings.ENGINE_PRELOAD if engine_executor_kind(name) == "process"]
+    )
+
+
+def _init_engine_worker(engine_name):
+    """Runs once in every process of an engine's dedicated pool: warm that engine if it is preloaded."""
+    from app.services.engine_registry import engine_registry
+
+    if engine_name in settings.ENGINE_PRELOAD:
+        engine_registry.preload([engine_name])
+
+
+def engine_executor_kind(engine_name):
+    """
+    'process' for CPU-bound engines, 'dedicated' for heavy model engines that get a process pool of
+    their own, 'thread' for I/O-bound ones (see settings.ENGINE_EXECUTORS).
+    """
+    kind = settings.ENGINE_EXECUTORS.get(engine_name, "process")
+    if kind in ("process", "dedicated") and settings.OCR_PROCESS_WORKERS <= 0:
+        return "thread"
+    return kind
+
+
+def get_thread_pool():
+    if executors.thread_pool is None:
+        executors.thread_pool = ThreadPoolExecutor(
+            max_workers=settings.OCR_THREAD_WORKERS, thread_name_prefix="ocr-io"
+        )
+    return executors.thread_pool
+
+
+def get_process_pool():
+    if settings.OCR_PROCESS_WORKERS <= 0:
+        return get_thread_pool()
+    if executors.process_pool is None:
+        executors.process_pool = ProcessPoolExecutor(
+            max_workers=settings.OCR_PROCESS_WORKERS,
+            mp_context=multiprocessing.get_context(settings.PROCESS_START_METHOD),
+            initializer=_init_process_worker,
+        )
+    return executors.process_pool
+
+
+def _engine_pool_size(engine_name):
+    return max(1, settings.ENGINE_PAGE_PARALLELISM.get(engine_name, 1))
+
+
+def get_engine_pool(engine_name):
+    """
+    Process pool used only by one engine, with one process per page it may work on at once
+    (settings.ENGINE_PAGE_PARALLELISM), so its model is loaded in that many processes and no more.
+    """
+    pool = executors.engine_pools.get(engine_name)
+    if pool is None:
+        pool = executors.engine_pools[engine_name] = ProcessPoolExecutor(
+            max_workers=_engine_pool_size(engine_name),
+            mp_context=multiprocessing.get_context(settings.PROCESS_START_METHOD),
+            initializer=_init_engine_worker,
+            initargs=(engine_name,),
+        )
+    return pool
+
+
+def page_limiter(engine_name):
+    """Semaphore capping how many pages an engine works on at once, shared by all documents."""
+    loop = asyncio.get_running_loop()
+    entry = executors.page_limiters.get(engine_name)
+    # asyncio primitives are bound to one loop; scripts that call asyncio.run() repeatedly get a fresh one
+    if entry is None or entry[0] is not loop:
+        limit = max(1, settings.ENGINE_PAGE_PARALLELISM.get(engine_name, 1))
+        entry = executors.page_limiters[engine_name] = (loop, asyncio.Semaphore(limit))
+    return entry[1]
+
+
+async def run_in_thread(fn, *args, **kwargs):
+    """Run blocking I/O (HTTP calls, file writes, PDF rendering) without stalling the event loop."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_thread_pool(), functools.partial(fn, *args, **kwargs))
+
+
+async def run_in_process(fn, *args, **kwargs):
+    """Run CPU-bound work in the process pool. fn and its arguments must be picklable."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_process_pool(), functools.partial(fn, *args, **kwargs))
+
+
+async def run_for_engine(engine_name, fn, *args, **kwargs):
+    """Dispatch work for an OCR engine to the pool configured for it."""
+    kind = engine_executor_kind(engine_name)
+    if kind == "dedicated":
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(get_engine_pool(engine_name), functools.partial(fn, *args, **kwargs))
+    if kind == "process":
+        return await run_in_process(fn, *args, **kwargs)
+    return await run_in_thread(fn, *args, **kwargs)
+
+
+async def start_executors():
+    """Startup hook: spin up the process pools early when process-bound engines are preloaded."""
+    loop = asyncio.get_running_loop()
+    # Force every worker to start (and run its initializer) now rather than on the first upload
+    if any(engine_executor_kind(name) == "process" for name in settings.ENGINE_PRELOAD):
+        pool = get_process_pool()
+        await asyncio.gather(
+            *(loop.run_in_executor(pool, abs, 0) for _ in range(settings.OCR_PROCESS_WORKERS))
+        )
+    for name in settings.ENGINE_PRELOAD:
+        if engine_executor_kind(name) == "dedicated":
+            pool = get_engine_pool(name)
+            await asyncio.gather(*(loop.run_in_executor(pool, abs, 0) for _ in range(_engine_pool_size(name))))
+
+
+def shutdown_executors():
+    """Shutdown hook: stop accepting work and release the pools."""
+    if executors.process_pool is not None:
+        executors.process_pool.shutdown(wait=False, cancel_futures=True)
+        executors.process_pool = None
+    for pool in executors.engine_pools.values():
+        pool.shutdown(wait=False, cancel_futures=True)
+    executors.engine_pools = {}
+    if executors.thread_pool is not None:
+        executors.thread_pool.shutdown(wait=False, cancel_futures=True)
+        executors.thread_pool = None
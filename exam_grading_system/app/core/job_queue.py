@@ -0,0 +1,147 @@
+from datetime import datetime, timedelta
+
+from bson import ObjectId
+from pymongo import ReturnDocument
+
+from app.core.config import settings
+from app.core.database import get_database
+
+# Jobs live on the documents themselves (queue_state, attempts, lease fields), so a document and
+# its job can never disagree and no extra collection has to be kept in sync.
+#   queued  -> waiting for a worker (from available_at on)
+#   leased  -> claimed by worker_id until lease_expires_at; an expired lease is claimable again
+#   done    -> finished, successfully or with a recorded failure
+QUEUED = "queued"
+LEASED = "leased"
+DONE = "done"
+
+
+class PermanentJobError(Exception):
+    """A job that no retry can fix (e.g. an invalid request); it is failed on the first attempt."""
+
+
+def new_job_fields(file_path: str, use_cache: bool = True):
+    """Queue fields to store on a new document record so it is enqueued by the same insert."""
+    now = datetime.utcnow()
+    return {
+        "file_path": file_path,
+        "use_cache": use_cache,
+        "queue_state": QUEUED,
+        "enqueued_at": now,
+        "available_at": now,
+        "lease_expires_at": None,
+        "worker_id": None,
+        "attempts": 0,
+        "last_error": None,
+    }
+
+
+async def claim_job(worker_id: str):
+    """
+    Atomically lease the oldest available job to worker_id.
+    Returns the claimed document, or None when the queue is empty.
+    """
+    db = await get_database()
+    now = datetime.utcnow()
+    return await db.documents.find_one_and_update(
+        {
+            "$or": [
+                {"queue_state": QUEUED, "available_at": {"$lte": now}},
+                # Lease ran out: the worker holding it died or stalled
+                {"queue_state": LEASED, "lease_expires_at": {"$lt": now}},
+            ]
+        },
+        {
+            "$set": {
+                "queue_state": LEASED,
+                "status": "processing",
+                "worker_id": worker_id,
+                "lease_expires_at": now + timedelta(seconds=settings.JOB_VISIBILITY_TIMEOUT),
+            },
+            "$inc": {"attempts": 1},
+        },
+        sort=[("enqueued_at", 1)],
+        return_document=ReturnDocument.AFTER,
+    )
+
+
+async def extend_lease(job_id, worker_id: str):
+    """Heartbeat: push the lease forward. Returns False if the job is no longer ours."""
+    db = await get_database()
+    result = await db.documents.update_one(
+        {"_id": ObjectId(job_id), "queue_state": LEASED, "worker_id": worker_id},
+        {"$set": {"lease_expires_at": datetime.utcnow() + timedelta(seconds=settings.JOB_VISIBILITY_TIMEOUT)}},
+    )
+    return result.modified_count == 1
+
+
+async def complete_job(job_id, worker_id: str):
+    db = await get_database()
+    await db.documents.update_one(
+        {"_id": ObjectId(job_id), "worker_id": worker_id},
+        {"$set": {"queue_state": DONE, "lease_expires_at": None}},
+    )
+
+
+async def retry_job(job_id, worker_id: str, error: str, attempts: int):
+    """Put a failed job back on the queue with exponential backoff."""
+    db = await get_database()
+    delay = settings.JOB_RETRY_BACKOFF * 2 ** max(0, attempts - 1)
+    await db.documents.update_one(
+        {"_id": ObjectId(job_id), "worker_id": worker_id},
+        {
+            "$set": {
+                "queue_state": QUEUED,
+                "status": "queued",
+                "available_at": datetime.utcnow() + timedelta(seconds=delay),
+                "lease_expires_at": None,
+                "worker_id": None,
+                "last_error": error,
+            }
+        },
+    )
+
+
+async def requeue_job(job_id, use_cache: bool = True, reset=None):
+    """
+    Put a finished (completed or failed) document back on the queue with a fresh attempt budget,
+    applying the extra `reset` fields in the same update. Returns False if it is still queued or running.
+    """
+    db = await get_database()
+    now = datetime.utcnow()
+    result = await db.documents.update_one(
+        {"_id": ObjectId(job_id), "queue_state": {"$nin": [QUEUED, LEASED]}},
+        {
+            "$set": {
+                **(reset or {}),
+                "queue_state": QUEUED,
+                "status": "queued",
+                "use_cache": use_cache,
+                "enqueued_at": now,
+                "available_at": now,
+                "lease_expires_at": None,
+                "worker_id": None,
+                "attempts": 0,
+                "last_error": None,
+                "error": None,
+            }
+        },
+    )
+    return result.modified_count == 1
+
+
+async def queue_depth():
+    """Number of jobs waiting to be claimed (including ones backing off before a retry)."""
+    db = await get_database()
+    return await db.documents.count_documents({"queue_state": QUEUED})
+
+
+async def queue_stats(doc):
+    """Queue depth and, for a waiting document, how many jobs are ahead of it."""
+    db = await get_database()
+    stats = {"depth": await queue_depth(), "position": None}
+    if doc.get("queue_state") == QUEUED and doc.get("enqueued_at") is not None:
+        stats["position"] = await db.documents.count_documents(
+            {"queue_state": QUEUED, "enqueued_at": {"$lt": doc["enqueued_at"]}}
+        ) + 1
+    return stats
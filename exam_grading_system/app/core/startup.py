@@ -0,0 +1,36 @@
+import time
+
+from app.core.metrics import metrics
+
+STARTUP_SECONDS = metrics.gauge(
+    "elavia_startup_seconds", "Time spent per startup phase (import, startup hooks)", ["phase"],
+)
+
+
+class StartupProfile:
+    """
+    Wall time of each startup phase, measured from when this module is first imported:
+    1. mark(phase) closes the current phase and starts the next one
+    2. report() prints the phases (and anything else worth knowing, e.g. loaded engines)
+    Phases are also exported as the elavia_startup_seconds gauge.
+    """
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self._last = self.started
+        self.phases = {}
+
+    def mark(self, phase):
+        now = time.perf_counter()
+        self.phases[phase] = now - self._last
+        self._last = now
+        STARTUP_SECONDS.set(self.phases[phase], phase=phase)
+
+    def report(self, **extra):
+        total = time.perf_counter() - self.started
+        parts = [f"{phase} {seconds:.2f}s" for phase, seconds in self.phases.items()]
+        parts += [f"{key}={value}" for key, value in extra.items()]
+        print(f"Startup profile: {', '.join(parts)} (total {total:.2f}s)")
+
+
+startup_profile = StartupProfile()
@@ -1,15 +1,42 @@
+from app.core.startup import startup_profile  # first, so the startup clock covers every import
 from fastapi import FastAPI
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, PlainTextResponse
 from app.api.routes import router
 from app.core.database import connect_to_mongo, close_mongo_connection
 from app.core.config import settings
+from app.core.executor import start_executors, shutdown_executors
+from app.core.job_queue import queue_depth
+from app.core.metrics import metrics, QUEUE_DEPTH
+from app.services.engine_registry import engine_registry, preload_engines
+from app.services.http_client import close_remote_clients
+from app.worker import start_embedded_workers, stop_embedded_workers
 import os
 
+startup_profile.mark("import")
+
 app = FastAPI(title="Exam Grading OCR System")
 
+
+def _begin_startup():
+    startup_profile.mark("until_startup")
+
+
+def _end_startup():
+    startup_profile.mark("startup_hooks")
+    startup_profile.report(engines_imported=engine_registry.imported() or "none")
+
+
 # Event Handlers for Database
+app.add_event_handler("startup", _begin_startup)
 app.add_event_handler("startup", connect_to_mongo)
+app.add_event_handler("startup", start_executors)
+app.add_event_handler("startup", preload_engines)
+app.add_event_handler("startup", start_embedded_workers)
+app.add_event_handler("startup", _end_startup)
+app.add_event_handler("shutdown", stop_embedded_workers)
+app.add_event_handler("shutdown", close_remote_clients)
+app.add_event_handler("shutdown", shutdown_executors)
 app.add_event_handler("shutdown", close_mongo_connection)
 
 # Include API Routes
@@ -25,4 +52,14 @@ app.mount("/results", StaticFiles(directory=settings.RESULTS_DIR), name="results
 # 2. Serve index.html at the root URL
 @app.get("/")
 async def read_index():
-    return FileResponse(os.path.join("static", "index.html"))
\ No newline at end of file
+    return FileResponse(os.path.join("static", "index.html"))
+
+
+# Prometheus scrape endpoint (text exposition format)
+@app.get("/metrics", response_class=PlainTextResponse)
+async def read_metrics():
+    try:
+        QUEUE_DEPTH.set(await queue_depth())
+    except Exception as e:
+        print(f"Could not sample queue depth: {e}")
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
\ No newline at end of file
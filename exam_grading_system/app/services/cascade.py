@@ -0,0 +1,33 @@
+from app.core.config import settings
+from app.services.engine_registry import engine_registry
+
+# Pseudo engine name accepted wherever an OCR engine is chosen
+CASCADE_ENGINE = "cascade"
+
+
+def is_cascade(ocr_engine):
+    return ocr_engine == CASCADE_ENGINE
+
+
+def resolve_engine(ocr_engine):
+    """
+    The engine name a document is processed under: "cascade", or a registered engine with unknown
+    names mapped to the default one. Resolved once, so rendering, scheduling and caching all agree.
+    """
+    return CASCADE_ENGINE if is_cascade(ocr_engine) else engine_registry.resolve(ocr_engine)
+
+
+def primary_engine(ocr_engine):
+    """The engine that sees every page: the cascade's primary engine, or the chosen engine itself."""
+    return settings.CASCADE_PRIMARY_ENGINE if is_cascade(ocr_engine) else ocr_engine
+
+
+def needs_escalation(result):
+    """
+    True for a primary-engine page result (see pipeline.py) too weak to keep: too little text, or a
+    confidence below CASCADE_MIN_CONFIDENCE. Engines that report no confidence are judged on text alone.
+    """
+    if len(result["text"].strip()) < settings.CASCADE_MIN_CHARS:
+        return True
+    confidence = result.get("confidence")
+    return confidence is not None and confidence < settings.CASCADE_MIN_CONFIDENCE
@@ -0,0 +1,436 @@
+import asyncio
+import os
+import time
+
+from bson import ObjectId
+
+from app.core.config import settings
+from app.core.database import get_database
+from app.core.events import event_bus
+from app.core.executor import page_limiter, run_for_engine, run_in_thread
+from app.core.job_queue import PermanentJobError
+from app.core.metrics import CACHE_LOOKUPS, CASCADE_ESCALATIONS, DOCUMENTS, PAGES, STAGE_SECONDS
+from app.services.cascade import is_cascade, needs_escalation, primary_engine, resolve_engine
+from app.services.engine_registry import engine_registry
+from app.services.pipeline import ocr_page, ocr_pages, ocr_pages_async
+from app.services.ocr_cache import ocr_cache, page_cache_key
+from app.services.rasterizer import pdf_page_count, rescale_for_engine, stream_pdf_pages
+from app.services.result_store import result_store
+from app.services.parser_service import QuestionParser, merge_answers
+
+
+def _metric_labels(ocr_engine, doc_type):
+    """Engine/doc_type labels, normalized so arbitrary form values can't create new series."""
+    return {
+        "engine": resolve_engine(ocr_engine),
+        "doc_type": "question_paper" if doc_type == "question_paper" else "answer_sheet",
+    }
+
+
+async def _ocr_pages_cached(ocr_engine, doc_type, images, debug_names, use_cache):
+    """
+    OCR a batch of pages, serving identical pages (same pixels, engine and preprocessing) from the cache.
+    Cache misses go to the engine in one call; returns page results (see pipeline.py) in input order,
+    each tagged with the engine that produced it.
+    """
+    results = [None] * len(images)
+    cache_keys = [None] * len(images)
+    if use_cache and settings.OCR_CACHE_ENABLED:
+        for i, image in enumerate(images):
+            cache_keys[i] = await run_in_thread(page_cache_key, image, ocr_engine, doc_type)
+            cached = await run_in_thread(ocr_cache.get, cache_keys[i])
+            if cached is not None:
+                cached_text, confidence = cached
+                results[i] = {"text": cached_text, "confidence": confidence, "preprocess_s": 0.0, "ocr_s": 0.0,
+                              "cached": True}
+            CACHE_LOOKUPS.inc(level="page", result="miss" if cached is None else "hit")
+
+    pending = [i for i, result in enumerate(results) if result is None]
+    if pending and engine_registry.is_async(ocr_engine):
+        pending_results = await ocr_pages_async(
+            ocr_engine, doc_type, [images[i] for i in pending], [debug_names[i] for i in pending]
+        )
+    elif len(pending) == 1:
+        i = pending[0]
+        pending_results = [
+            await run_for_engine(ocr_engine, ocr_page, ocr_engine, doc_type, images[i], debug_names[i])
+        ]
+    elif pending:
+        pending_results = await run_for_engine(
+            ocr_engine, ocr_pages, ocr_engine, doc_type,
+            [images[i] for i in pending], [debug_names[i] for i in pending],
+        )
+    else:
+        pending_results = []
+
+    for i, result in zip(pending, pending_results):
+        results[i] = result
+        if cache_keys[i] is not None:
+            await run_in_thread(ocr_cache.put, cache_keys[i], result["text"], result.get("confidence"))
+    for result in results:
+        result["engine"] = engine_registry.resolve(ocr_engine)
+    return results
+
+
+async def _ocr_pages_cascade(doc_type, images, debug_names, use_cache):
+    """
+    Cascade OCR for a batch of pages: every page goes to the primary engine, and only the pages it
+    reads poorly (see cascade.needs_escalation) are sent again to the fallback engine, resized to
+    the fallback's render profile. Escalated results keep the primary engine's attempt under "escalated_from".
+    """
+    primary, fallback = settings.CASCADE_PRIMARY_ENGINE, settings.CASCADE_FALLBACK_ENGINE
+    results = await _ocr_pages_cached(primary, doc_type, images, debug_names, use_cache)
+    weak = [i for i, result in enumerate(results) if needs_escalation(result)]
+    if not weak:
+        return results
+
+    resized = await run_in_thread(lambda: [rescale_for_engine(images[i], primary, fallback) for i in weak])
+    escalated = await _ocr_pages_cached(
+        fallback, doc_type, resized,
+        [f"{debug_names[i]}_{fallback}" if debug_names[i] else None for i in weak], use_cache,
+    )
+    for i, result in zip(weak, escalated):
+        first = results[i]
+        result["escalated_from"] = {"engine": first["engine"], "confidence": first.get("confidence")}
+        # The page cost both attempts
+        result["preprocess_s"] += first["preprocess_s"]
+        result["ocr_s"] += first["ocr_s"]
+        result["cached"] = first.get("cached", False) and result.get("cached", False)
+        results[i] = result
+    return results
+
+
+class PageFailures(Exception):
+    """Some pages could not be OCR'd; every other page of the run finished (and was checkpointed)."""
+
+    def __init__(self, errors):
+        self.errors = errors  # page_index -> error message
+        pages = ", ".join(str(page_index + 1) for page_index in sorted(errors))
+        super().__init__(f"OCR failed on page(s) {pages}: {errors[min(errors)]}")
+
+
+async def run_pipeline(doc_id: str, file_path: str, doc_type: str, ocr_engine: str, use_cache: bool = True,
+                       pages=None, done_pages=None, checkpoint=None):
+    """
+    Rasterizes, OCRs and parses one document, publishing progress events as it goes.
+    Returns the result payload; persisting it is left to the caller. Raises on failure.
+    1. pages limits the run to those 0-based page indices (all pages by default)
+    2. done_pages (page_index -> {"text", "source", "engine", "confidence"}) are reused, not processed again
+    3. checkpoint(results, errors), when given, is awaited after every OCR batch with the pages it
+       finished and the ones that failed; a failed page does not stop the others, PageFailures is
+       raised once they are done
+    """
+    labels = _metric_labels(ocr_engine, doc_type)
+    # In cascade mode pages are rendered and scheduled for the primary engine
+    engine = primary_engine(ocr_engine)
+
+    page_count = await run_in_thread(pdf_page_count, file_path)
+    selected = list(range(page_count)) if pages is None else [i for i in pages if 0 <= i < page_count]
+    wanted = set(selected)
+    page_results = {i: result for i, result in (done_pages or {}).items() if i in wanted}
+    page_errors = {}
+    todo = [i for i in selected if i not in page_results]
+    if page_results:
+        event_bus.publish(doc_id, "resumed", pages=len(page_results), pending=len(todo))
+
+    # 1. Stream PDF pages and 2. pre-process + OCR them as they arrive.
+    # Engines with a batch API (e.g. Surya) get several pages per call, others one page per call.
+    # Born-digital pages skip both steps and come straight from the PDF text layer.
+    limiter = page_limiter(engine)
+    # Looking at the engine's capabilities imports its module on first use; keep that off the event loop
+    batch_size = await run_in_thread(engine_registry.batch_size, engine)
+
+    # 3. Parse as we go: pages are fed to the parser in order as soon as all earlier pages are done
+    parser = QuestionParser()
+    parsed_data = []
+    next_position = 0  # position in `selected` of the next page to parse
+    parse_seconds = 0.0
+
+    def parse_ready_pages():
+        nonlocal next_position, parse_seconds
+        started = time.perf_counter()
+        while next_position < len(selected) and selected[next_position] in page_results:
+            for line in page_results[selected[next_position]]["text"].split("\n"):
+                question = parser.feed(line)
+                if question is not None:
+                    parsed_data.append(question)
+            next_position += 1
+        parse_seconds += time.perf_counter() - started
+
+    parse_ready_pages()
+
+    async def ocr_batch(batch, release):
+        images = [image for _, image in batch]
+        debug_names = [
+            f"{doc_id}_page_{page_index}" if settings.DEBUG_SAVE_PAGES else None
+            for page_index, _ in batch
+        ]
+        failed = {}
+        try:
+            if is_cascade(ocr_engine):
+                results = await _ocr_pages_cascade(doc_type, images, debug_names, use_cache)
+            else:
+                results = await _ocr_pages_cached(ocr_engine, doc_type, images, debug_names, use_cache)
+        except Exception as exc:
+            # e.g. a transient API error on one page: keep the rest of the document going
+            failed = {page_index: str(exc) or type(exc).__name__ for page_index, _ in batch}
+        finally:
+            release()
+        if failed:
+            page_errors.update(failed)
+            for page_index, error in failed.items():
+                event_bus.publish(doc_id, "page_failed", page=page_index + 1, error=error)
+            if checkpoint is not None:
+                await checkpoint({}, failed)
+            return
+        for (page_index, _), result in zip(batch, results):
+            page = page_index + 1
+            cached = result.get("cached", False)
+            event_bus.publish(doc_id, "preprocessed", page=page, seconds=result["preprocess_s"],
+                              stages=result.get("preprocess_stages", {}), cached=cached)
+            if "escalated_from" in result:
+                escalated_from = result["escalated_from"]
+                event_bus.publish(doc_id, "escalated", page=page, engine=result["engine"],
+                                  from_engine=escalated_from["engine"], confidence=escalated_from["confidence"])
+                CASCADE_ESCALATIONS.inc(engine=result["engine"])
+            event_bus.publish(doc_id, "ocr_done", page=page, seconds=result["ocr_s"], engine=result["engine"],
+                              cached=cached)
+            if cached:
+                PAGES.inc(source="cache", **labels)
+            else:
+                STAGE_SECONDS.observe(result["preprocess_s"], stage="preprocess", **labels)
+                STAGE_SECONDS.observe(result["ocr_s"], stage="ocr", **labels)
+                PAGES.inc(source="ocr", **labels)
+            result["source"] = "ocr"
+            page_results[page_index] = result
+        if checkpoint is not None:
+            await checkpoint({page_index: page_results[page_index] for page_index, _ in batch}, {})
+        parse_ready_pages()
+
+    batch_tasks = []
+
+    def permit_release():
+        """Gives the engine permit back exactly once: when OCR ends, or when the task dies before it starts."""
+        released = False
+
+        def release(*_):
+            nonlocal released
+            if not released:
+                released = True
+                limiter.release()
+        return release
+
+    async def submit(batch):
+        # Backpressure: only pull more pages once the engine has room for them
+        await limiter.acquire()
+        release = permit_release()
+        batch_task = asyncio.create_task(ocr_batch(batch, release))
+        # A task cancelled before its first step never reaches ocr_batch's finally
+        batch_task.add_done_callback(release)
+        if not settings.PARALLEL_PAGES:
+            await batch_task
+        batch_tasks.append(batch_task)
+
+    page_stream = stream_pdf_pages(file_path, engine, pages=todo)
+    try:
+        batch = []
+        async for page in page_stream:
+            if page.source != "ocr":
+                # Text-layer and blank pages are done as soon as they are read
+                page_results[page.index] = {"text": page.text, "source": page.source}
+                if page.source == "blank":
+                    event_bus.publish(doc_id, "skipped", page=page.index + 1, reason="blank", seconds=page.seconds)
+                else:
+                    event_bus.publish(doc_id, "text_extracted", page=page.index + 1, seconds=page.seconds)
+                STAGE_SECONDS.observe(page.seconds, stage="rasterize", **labels)
+                PAGES.inc(source=page.source, **labels)
+                parse_ready_pages()
+                continue
+            event_bus.publish(doc_id, "rasterized", page=page.index + 1, seconds=page.seconds, crop=page.crop)
+            STAGE_SECONDS.observe(page.seconds, stage="rasterize", **labels)
+            batch.append((page.index, page.image))
+            if len(batch) >= batch_size:
+                await submit(batch)
+                batch = []
+        if batch:
+            await submit(batch)
+        await asyncio.gather(*batch_tasks)
+    except BaseException:
+        for batch_task in batch_tasks:
+            batch_task.cancel()
+        # Let the cancellations land (and their permits return) and close the PDF before the error propagates
+        await asyncio.gather(*batch_tasks, return_exceptions=True)
+        await page_stream.aclose()
+        raise
+    if page_errors:
+        raise PageFailures(page_errors)
+
+    # One entry per PDF page; pages outside `pages` stay None
+    ordered = [page_results.get(page_index, {}) for page_index in range(page_count)]
+    all_raw_text = [result.get("text") for result in ordered]
+    page_sources = [result.get("source") for result in ordered]
+    # Which engine read each page (None for text-layer and blank pages) and how sure it was, where it says
+    page_engines = [result.get("engine") for result in ordered]
+    page_confidences = [result.get("confidence") for result in ordered]
+
+    parse_ready_pages()
+    started = time.perf_counter()
+    last_question = parser.close()
+    if last_question is not None:
+        parsed_data.append(last_question)
+    if doc_type != "question_paper":
+        # Answers continued under a repeated header are combined
+        parsed_data = merge_answers(parsed_data)
+
+    parsed_payload = [q.dict() for q in parsed_data]
+    parse_seconds += time.perf_counter() - started
+    event_bus.publish(doc_id, "parsed", questions=len(parsed_payload), seconds=parse_seconds)
+    STAGE_SECONDS.observe(parse_seconds, stage="parse", **labels)
+    return {
+        "filename": os.path.basename(file_path),
+        "doc_type": doc_type,
+        "ocr_engine": ocr_engine,
+        "status": "completed",
+        "parsed_result": parsed_payload,
+        "raw_text_pages": all_raw_text,
+        "page_sources": page_sources,
+        "page_engines": page_engines,
+        "page_confidences": page_confidences,
+    }
+
+
+def _save_result_file(doc_id, payload):
+    # The DB record is authoritative; a failed file write is logged rather than failing the job
+    try:
+        result_store.save(doc_id, payload)
+    except Exception as exc:
+        print(f"Failed to persist result {doc_id}: {exc}")
+
+
+async def _timed(stage, labels, awaitable):
+    started = time.perf_counter()
+    result = await awaitable
+    STAGE_SECONDS.observe(time.perf_counter() - started, stage=stage, **labels)
+    return result
+
+
+async def _persist(doc_id, payload, update, labels):
+    """Writes the result file (off the event loop) and updates the DB record at the same time."""
+    db = await get_database()
+    await asyncio.gather(
+        _timed("persist_file", labels, run_in_thread(_save_result_file, doc_id, payload)),
+        _timed("persist_db", labels, db.documents.update_one({"_id": ObjectId(doc_id)}, {"$set": update})),
+    )
+
+
+# Page result key -> per-page array on the document record; checkpoints $set single entries of these
+PAGE_FIELDS = {"text": "raw_text_pages", "source": "page_sources", "engine": "page_engines",
+               "confidence": "page_confidences"}
+
+
+def selected_pages(page_count, page_range=None):
+    """0-based indices of the pages to process: all of them, or those in a 1-based [first, last] range."""
+    if not page_range:
+        return list(range(page_count))
+    first, last = page_range
+    if first > page_count:
+        raise PermanentJobError(f"Page range {first}-{last} starts after the last page ({page_count})")
+    return list(range(first - 1, min(last, page_count)))
+
+
+def reset_pages_update(page_indices):
+    """$set fields that drop the checkpoints of the given pages, so the next run processes them again."""
+    return {f"{field}.{page_index}": None for page_index in page_indices for field in PAGE_FIELDS.values()}
+
+
+async def _load_checkpoint(doc_id, page_count):
+    """
+    Pages finished by earlier attempts, as page results keyed by page index.
+    A document without checkpoints gets its per-page arrays sized first: $set on "raw_text_pages.N"
+    only indexes into an array that already exists (it would create an object otherwise).
+    """
+    db = await get_database()
+    doc = await db.documents.find_one({"_id": ObjectId(doc_id)}, {field: 1 for field in PAGE_FIELDS.values()})
+    texts = (doc or {}).get("raw_text_pages")
+    if not isinstance(texts, list) or len(texts) != page_count:
+        await db.documents.update_one(
+            {"_id": ObjectId(doc_id)},
+            {"$set": {field: [None] * page_count for field in PAGE_FIELDS.values()}, "$unset": {"page_errors": ""}},
+        )
+        return {}
+
+    def entry(field, page_index):
+        values = doc.get(field) or []
+        return values[page_index] if page_index < len(values) else None
+
+    return {
+        page_index: {key: entry(field, page_index) for key, field in PAGE_FIELDS.items()}
+        for page_index, text in enumerate(texts)
+        if text is not None
+    }
+
+
+async def _checkpoint(doc_id, results, errors, labels):
+    """Records finished pages (and clears their earlier errors) and failed pages with one update."""
+    update = {"$set": {}, "$unset": {}}
+    for page_index, result in results.items():
+        for key, field in PAGE_FIELDS.items():
+            update["$set"][f"{field}.{page_index}"] = result.get(key)
+        update["$unset"][f"page_errors.{page_index + 1}"] = ""
+    for page_index, error in errors.items():
+        update["$set"][f"page_errors.{page_index + 1}"] = error
+    update = {operator: fields for operator, fields in update.items() if fields}
+    # Like the result file, a lost checkpoint only costs a page on the next attempt
+    try:
+        db = await get_database()
+        await _timed("checkpoint", labels, db.documents.update_one({"_id": ObjectId(doc_id)}, update))
+    except Exception as exc:
+        print(f"Failed to checkpoint pages of {doc_id}: {exc}")
+
+
+async def process_document(doc_id: str, file_path: str, doc_type: str, ocr_engine: str, use_cache: bool = True,
+                           page_range=None):
+    """
+    Runs the OCR pipeline for one document (or the 1-based [first, last] page_range of it) and persists
+    the result. Raises on failure. Every OCR'd page is checkpointed on the DB record as it finishes,
+    so a retry or resume only processes the pages that are still missing.
+    """
+    ocr_engine = resolve_engine(ocr_engine)
+    labels = _metric_labels(ocr_engine, doc_type)
+    page_count = await run_in_thread(pdf_page_count, file_path)
+    pages = selected_pages(page_count, page_range)
+    done_pages = await _load_checkpoint(doc_id, page_count)
+
+    async def checkpoint(results, errors):
+        await _checkpoint(doc_id, results, errors, labels)
+
+    result_payload = await run_pipeline(doc_id, file_path, doc_type, ocr_engine, use_cache,
+                                        pages=pages, done_pages=done_pages, checkpoint=checkpoint)
+    if page_range:
+        result_payload["page_range"] = list(page_range)
+
+    # 4. Save the result file and update the DB
+    started = time.perf_counter()
+    update = {"status": "completed"}
+    for field in ("parsed_result", "raw_text_pages", "page_sources", "page_engines", "page_confidences"):
+        update[field] = result_payload[field]
+    await _persist(doc_id, result_payload, update, labels)
+    DOCUMENTS.inc(status="completed", **labels)
+    event_bus.publish(doc_id, "persisted", seconds=time.perf_counter() - started)
+    event_bus.publish(doc_id, "completed", pages=len(pages))
+
+
+async def record_failure(doc_id: str, file_path: str, doc_type: str, ocr_engine: str, error: str):
+    """Marks a document as failed in the results directory and the DB."""
+    failure_payload = {
+        "filename": os.path.basename(file_path),
+        "doc_type": doc_type,
+        "ocr_engine": ocr_engine,
+        "status": "failed",
+        "error": error,
+    }
+    labels = _metric_labels(ocr_engine, doc_type)
+    await _persist(doc_id, failure_payload, {"status": "failed", "error": error}, labels)
+    DOCUMENTS.inc(status="failed", **labels)
+    event_bus.publish(doc_id, "failed", error=error)
+
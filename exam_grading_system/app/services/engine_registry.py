@@ -0,0 +1,200 @@
+import asyncio
+import gc
+import importlib
+import threading
+import time
+from contextlib import contextmanager
+
+from app.core.config import settings
+from app.core.executor import engine_executor_kind
+
+# Engine name (as sent by the upload form) -> "module:Class" of its service, imported on first use so
+# processes only pay for the engines they actually run. Extra engines can be added via settings.ENGINE_PLUGINS.
+ENGINE_FACTORIES = {
+    "gemini": "app.services.ocr_service:OCRService",
+    "tesseract": "app.services.tesseract_service:TesseractService",
+    "tesserocr": "app.services.tesserocr_service:TesserocrService",
+    "paddle": "app.services.paddle_service:PaddleService",
+    "qwen": "app.services.qwen_service:QwenService",
+    "surya": "app.services.surya_service:SuryaService",
+    **settings.ENGINE_PLUGINS,
+}
+
+DEFAULT_ENGINE = "tesseract"
+
+
+def import_factory(spec):
+    """Resolves a "module:Class" spec to the class (other factories are returned as they are)."""
+    if not isinstance(spec, str):
+        return spec
+    module_name, _, attr = spec.partition(":")
+    started = time.perf_counter()
+    factory = getattr(importlib.import_module(module_name), attr)
+    print(f"Imported {spec} in {time.perf_counter() - started:.2f}s")
+    return factory
+
+
+class _EngineSlot:
+    """Holds one lazily imported, lazily loaded engine instance and its bookkeeping."""
+
+    def __init__(self, spec):
+        self.spec = spec
+        self._factory = None
+        self.instance = None
+        self.load_lock = threading.Lock()
+        self.use_lock = None
+        self.in_use = 0
+        self.last_used = 0.0
+
+    @property
+    def factory(self):
+        """The engine class, imported on first access."""
+        if self._factory is None:
+            with self.load_lock:
+                if self._factory is None:
+                    factory = import_factory(self.spec)
+                    # Engines that are not thread-safe are used by one caller at a time
+                    self.use_lock = None if getattr(factory, "thread_safe", False) else threading.Lock()
+                    self._factory = factory
+        return self._factory
+
+
+class EngineRegistry:
+    """
+    Process-wide cache of warm OCR engines:
+    1. Each engine is imported and constructed once, on first use or via preload()
+    2. acquire() hands out the shared instance, serializing engines that are not thread-safe
+    3. Engines idle for longer than idle_timeout seconds are unloaded (0 disables eviction)
+    """
+
+    def __init__(self, factories, idle_timeout=0, default_engine=DEFAULT_ENGINE):
+        self._slots = {name: _EngineSlot(factory) for name, factory in factories.items()}
+        self._default_engine = default_engine
+        self._idle_timeout = idle_timeout
+        self._reaper = None
+        self._reaper_lock = threading.Lock()
+
+    def register(self, name, factory):
+        """
+        Add an engine, or replace one (dropping its loaded instance), e.g. a stub in benchmarks.
+        factory is a class or a "module:Class" spec.
+        """
+        self._slots[name] = _EngineSlot(factory)
+
+    def resolve(self, name):
+        """Map an engine name to a registered one, falling back to the default engine."""
+        return name if name in self._slots else self._default_engine
+
+    def get(self, name):
+        """Return the warm instance for an engine, loading it on first use."""
+        slot = self._slots[self.resolve(name)]
+        if slot.instance is None:
+            factory = slot.factory
+            with slot.load_lock:
+                if slot.instance is None:
+                    started = time.perf_counter()
+                    slot.instance = factory()
+                    print(f"Loaded OCR engine '{self.resolve(name)}' in {time.perf_counter() - started:.2f}s")
+                    self._ensure_reaper()
+        slot.last_used = time.monotonic()
+        return slot.instance
+
+    @contextmanager
+    def acquire(self, name):
+        """Borrow an engine for the duration of a with-block."""
+        slot = self._slots[self.resolve(name)]
+        with slot.load_lock:
+            slot.in_use += 1
+        try:
+            engine = self.get(name)  # also imports the factory, which sets use_lock
+            if slot.use_lock is None:
+                yield engine
+            else:
+                with slot.use_lock:
+                    yield engine
+        finally:
+            with slot.load_lock:
+                slot.in_use -= 1
+                slot.last_used = time.monotonic()
+
+    def batch_size(self, name):
+        """Pages per engine call: settings.ENGINE_BATCH_SIZES for engines with extract_text_batch(), else 1."""
+        name = self.resolve(name)
+        if not hasattr(self._slots[name].factory, "extract_text_batch"):
+            return 1
+        return max(1, settings.ENGINE_BATCH_SIZES.get(name, 1))
+
+    def is_async(self, name):
+        """True for engines with extract_text_async(), which the pipeline awaits on the event loop."""
+        return hasattr(self._slots[self.resolve(name)].factory, "extract_text_async")
+
+    def preload(self, names):
+        """Load the given engines up front so the first request does not pay the cold start."""
+        for name in names:
+            if name not in self._slots:
+                print(f"Skipping preload of unknown OCR engine '{name}'")
+                continue
+            try:
+                self.get(name)
+            except Exception as exc:
+                print(f"Failed to preload OCR engine '{name}': {exc}")
+
+    def loaded(self):
+        """Names of the engines currently held in memory."""
+        return [name for name, slot in self._slots.items() if slot.instance is not None]
+
+    def imported(self):
+        """Names of the engines whose code has been imported in this process."""
+        return [name for name, slot in self._slots.items() if slot._factory is not None]
+
+    def evict(self, name):
+        """Unload an engine unless it is currently in use. Returns True if it was unloaded."""
+        slot = self._slots.get(name)
+        if slot is None:
+            return False
+        with slot.load_lock:
+            if slot.instance is None or slot.in_use:
+                return False
+            slot.instance = None
+        gc.collect()
+        print(f"Unloaded idle OCR engine '{name}'")
+        return True
+
+    def evict_idle(self, now=None):
+        """Unload every engine that has been idle longer than the configured timeout."""
+        if not self._idle_timeout:
+            return []
+        now = time.monotonic() if now is None else now
+        evicted = []
+        for name, slot in self._slots.items():
+            if slot.instance is not None and not slot.in_use and now - slot.last_used > self._idle_timeout:
+                if self.evict(name):
+                    evicted.append(name)
+        return evicted
+
+    def _ensure_reaper(self):
+        if not self._idle_timeout:
+            return
+        with self._reaper_lock:
+            if self._reaper is None:
+                self._reaper = threading.Thread(target=self._reap_forever, name="engine-reaper", daemon=True)
+                self._reaper.start()
+
+    def _reap_forever(self):
+        interval = max(1.0, self._idle_timeout / 4)
+        while True:
+            time.sleep(interval)
+            self.evict_idle()
+
+
+engine_registry = EngineRegistry(ENGINE_FACTORIES, idle_timeout=settings.ENGINE_IDLE_TIMEOUT)
+
+
+async def preload_engines():
+    """Startup hook: warm the thread-bound engines listed in settings.ENGINE_PRELOAD.
+
+    Process-bound engines are warmed inside each pool process by the executor initializer.
+    """
+    names = [name for name in settings.ENGINE_PRELOAD if engine_executor_kind(name) == "thread"]
+    if names:
+        await asyncio.to_thread(engine_registry.preload, names)
@@ -0,0 +1,131 @@
+import asyncio
+import random
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+
+import httpx
+
+from app.core.config import settings
+
+RETRY_STATUS_CODES = {408, 425, 429, 500, 502, 503, 504}
+# Transient network failures; other httpx errors (e.g. malformed requests) are not retried
+RETRY_EXCEPTIONS = (httpx.TimeoutException, httpx.NetworkError, httpx.RemoteProtocolError)
+
+
+class TokenBucket:
+    """Async token bucket: `rate` requests per second on average, bursts of up to `burst`."""
+
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.capacity = max(1, burst)
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        if not self.rate:
+            return
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+def _retry_after_seconds(response):
+    """Parse a Retry-After header given either in seconds or as an HTTP date."""
+    value = response.headers.get("Retry-After")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, (parsedate_to_datetime(value) - datetime.now(timezone.utc)).total_seconds())
+    except (TypeError, ValueError):
+        return None
+
+
+class RemoteEngineClient:
+    """
+    Pooled async HTTP client for one remote OCR engine:
+    1. Keep-alive connection pool shared by every page sent to the engine
+    2. Concurrency limit and token-bucket rate limit per engine
+    3. Retries on transport errors, 429 and 5xx with jittered exponential backoff, honoring Retry-After
+    """
+
+    def __init__(self, name, max_concurrency, rate, burst, max_retries, timeout):
+        self.name = name
+        self.max_retries = max_retries
+        self._client = httpx.AsyncClient(
+            timeout=timeout,
+            limits=httpx.Limits(max_connections=max_concurrency, max_keepalive_connections=max_concurrency),
+        )
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._bucket = TokenBucket(rate, burst)
+
+    async def post_json(self, url, payload, headers=None):
+        """POST a JSON body and return the decoded JSON response, raising ValueError once retries run out."""
+        attempt = 0
+        while True:
+            delay = None
+            async with self._semaphore:
+                await self._bucket.acquire()
+                try:
+                    response = await self._client.post(url, json=payload, headers=headers)
+                except RETRY_EXCEPTIONS as exc:
+                    if attempt >= self.max_retries:
+                        raise ValueError(f"{self.name} request failed: {exc}") from exc
+                except httpx.HTTPError as exc:
+                    raise ValueError(f"{self.name} request failed: {exc}") from exc
+                else:
+                    if response.status_code == 200:
+                        return response.json()
+                    if response.status_code not in RETRY_STATUS_CODES or attempt >= self.max_retries:
+                        raise ValueError(f"API request failed: {response.status_code} - {response.text}")
+                    delay = _retry_after_seconds(response)
+
+            if delay is None:
+                # Full jitter keeps many pages from retrying in lock-step
+                delay = random.uniform(0, min(settings.REMOTE_BACKOFF_MAX, settings.REMOTE_BACKOFF_BASE * 2 ** attempt))
+            attempt += 1
+            print(f"Retrying {self.name} request (attempt {attempt}/{self.max_retries}) in {delay:.1f}s")
+            await asyncio.sleep(delay)
+
+    async def aclose(self):
+        await self._client.aclose()
+
+
+_clients = {}
+
+
+def get_remote_client(name):
+    """Return the shared client for an engine, creating it for the running event loop on first use."""
+    loop = asyncio.get_running_loop()
+    entry = _clients.get(name)
+    if entry is None or entry[0] is not loop:
+        client = RemoteEngineClient(
+            name,
+            max_concurrency=max(1, settings.REMOTE_MAX_CONCURRENCY.get(name, 4)),
+            rate=settings.REMOTE_RATE_LIMITS.get(name, 0),
+            burst=settings.REMOTE_BURST.get(name, 1),
+            max_retries=settings.REMOTE_MAX_RETRIES,
+            timeout=settings.REMOTE_TIMEOUT,
+        )
+        entry = _clients[name] = (loop, client)
+    return entry[1]
+
+
+async def close_remote_clients():
+    """Shutdown hook: close the connection pools owned by the running event loop."""
+    loop = asyncio.get_running_loop()
+    for name, (client_loop, client) in list(_clients.items()):
+        if client_loop is loop:
+            await client.aclose()
+            del _clients[name]
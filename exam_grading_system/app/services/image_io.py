@@ -0,0 +1,89 @@
+import os
+from io import BytesIO
+
+import cv2
+import numpy as np
+from PIL import Image
+
+from app.core.config import settings
+
+# In-memory page images are numpy uint8 arrays in RGB (H, W, 3) or grayscale (H, W) order.
+# Engines accept such arrays, PIL images or, for backwards compatibility, file paths.
+
+
+def pixmap_to_array(pix):
+    """
+    Wraps a fitz pixmap's samples as an (H, W, n) array, or (H, W) for grayscale pixmaps.
+    The samples are copied out of MuPDF once; the array is a view on that buffer, not another copy.
+    """
+    array = np.frombuffer(pix.samples, dtype=np.uint8)
+    if pix.n == 1:
+        return array.reshape(pix.height, pix.width)
+    return array.reshape(pix.height, pix.width, pix.n)
+
+
+def to_pil(image):
+    """Returns a PIL image for a path, array or PIL image."""
+    if isinstance(image, Image.Image):
+        return image
+    if isinstance(image, np.ndarray):
+        return Image.fromarray(image)
+    return Image.open(image)
+
+
+def to_rgb_array(image):
+    """Returns an RGB (or grayscale) uint8 array for a path, array or PIL image."""
+    if isinstance(image, np.ndarray):
+        return image
+    if isinstance(image, Image.Image):
+        if image.mode not in ("RGB", "L"):
+            image = image.convert("RGB")
+        return np.asarray(image)
+    img = cv2.imread(image)
+    if img is None:
+        raise ValueError(f"Could not load image from {image}")
+    return cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
+
+
+def to_gray_array(image):
+    """Returns a single-channel uint8 array."""
+    img = to_rgb_array(image)
+    if img.ndim == 2:
+        return img
+    if img.shape[2] == 4:
+        return cv2.cvtColor(img, cv2.COLOR_RGBA2GRAY)
+    return cv2.cvtColor(img, cv2.COLOR_RGB2GRAY)
+
+
+def to_bgr_array(image):
+    """Returns a 3-channel BGR array, the layout OpenCV-based engines expect."""
+    if isinstance(image, str):
+        img = cv2.imread(image)
+        if img is None:
+            raise ValueError(f"Could not load image from {image}")
+        return img
+    img = to_rgb_array(image)
+    if img.ndim == 2:
+        return cv2.cvtColor(img, cv2.COLOR_GRAY2BGR)
+    if img.shape[2] == 4:
+        return cv2.cvtColor(img, cv2.COLOR_RGBA2BGR)
+    return cv2.cvtColor(img, cv2.COLOR_RGB2BGR)
+
+
+def encode_jpeg(image, quality):
+    """JPEG bytes of a path, array or PIL image (grayscale stays single-channel)."""
+    img = to_pil(image)
+    if img.mode not in ("RGB", "L"):
+        img = img.convert("RGB")
+    buffer = BytesIO()
+    img.save(buffer, format="JPEG", quality=quality)
+    return buffer.getvalue()
+
+
+def save_debug_image(image, name):
+    """Writes an intermediate image to UPLOAD_DIR when DEBUG_SAVE_PAGES is enabled."""
+    if not settings.DEBUG_SAVE_PAGES:
+        return None
+    path = os.path.join(settings.UPLOAD_DIR, name)
+    to_pil(image).save(path, 'PNG')
+    return path
@@ -0,0 +1,166 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from app.core.config import settings
+from app.services.cascade import is_cascade
+from app.services.image_processing import preprocess_settings
+from app.services.rasterizer import render_profile
+
+# Bump when preprocessing changes in a way that alters OCR input, so old entries stop matching
+PREPROCESS_VERSION = "2"
+
+# Page-selection settings that decide which pages are OCR'd, read from the text layer or skipped as blank
+PAGE_SETTINGS = (
+    "TEXT_LAYER_FAST_PATH", "TEXT_LAYER_MIN_CHARS", "TEXT_LAYER_MIN_FONT_COVERAGE", "TEXT_LAYER_MAX_IMAGE_RATIO",
+    "SKIP_BLANK_PAGES", "CROP_TO_CONTENT", "CONTENT_WORK_SIZE", "CONTENT_INK_CONTRAST",
+    "CONTENT_MIN_COMPONENT_AREA", "BLANK_MAX_INK_RATIO", "CROP_MAX_AREA_RATIO", "CROP_MARGIN",
+)
+
+
+def _fingerprint(values):
+    return hashlib.sha256(json.dumps(values, sort_keys=True, default=str).encode()).hexdigest()
+
+
+def page_cache_key(image, ocr_engine, doc_type):
+    """
+    Content address of one OCR call: rendered pixels + engine + preprocessing parameters.
+    Identical pages OCR'd the same way share a key regardless of which file they came from.
+    """
+    digest = hashlib.sha256()
+    digest.update(f"{settings.OCR_CACHE_VERSION}|{PREPROCESS_VERSION}|{ocr_engine}|{doc_type}|".encode())
+    digest.update(f"{_fingerprint(preprocess_settings())}|".encode())
+    digest.update(f"{image.shape}|{image.dtype}|".encode())
+    digest.update(image.tobytes() if not image.flags["C_CONTIGUOUS"] else memoryview(image))
+    return digest.hexdigest()
+
+
+def document_settings_key(ocr_engine, doc_type):
+    """
+    Fingerprint of everything besides the file that shapes a document's result: the engines' render
+    profiles, page selection (text layer, blank pages, cropping) and preprocessing settings and, in cascade
+    mode, both engines and the escalation thresholds. The document cache only matches on an equal key.
+    """
+    engines = [ocr_engine]
+    values = {"version": settings.OCR_CACHE_VERSION, "preprocess_version": PREPROCESS_VERSION, "doc_type": doc_type,
+              "preprocess": preprocess_settings(), "pages": {name: getattr(settings, name) for name in PAGE_SETTINGS}}
+    if is_cascade(ocr_engine):
+        engines = [settings.CASCADE_PRIMARY_ENGINE, settings.CASCADE_FALLBACK_ENGINE]
+        values["cascade"] = [settings.CASCADE_MIN_CONFIDENCE, settings.CASCADE_MIN_CHARS]
+    values["engines"] = {engine: render_profile(engine) for engine in engines}
+    return _fingerprint(values)
+
+
+class OCRCache:
+    """
+    Page-level OCR text (and engine confidence) cache stored in SQLite:
+    1. Entries older than ttl seconds are treated as misses and purged
+    2. Beyond max_entries, the least recently used entries are evicted
+    3. Hit/miss counters (page and document level) are kept for monitoring
+    """
+
+    def __init__(self, path, max_entries, ttl):
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.page_hits = 0
+        self.page_misses = 0
+        self.document_hits = 0
+        self.document_misses = 0
+        self._lock = threading.Lock()
+        self._conn = None
+        self._puts_since_evict = 0
+
+    def _connection(self):
+        if self._conn is None:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS pages ("
+                "key TEXT PRIMARY KEY, text TEXT NOT NULL, created REAL NOT NULL, accessed REAL NOT NULL, "
+                "confidence REAL)"
+            )
+            # Caches created before confidences were stored gain the column in place
+            columns = [row[1] for row in self._conn.execute("PRAGMA table_info(pages)")]
+            if "confidence" not in columns:
+                self._conn.execute("ALTER TABLE pages ADD COLUMN confidence REAL")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS pages_accessed ON pages (accessed)")
+        return self._conn
+
+    def get(self, key):
+        """Returns (text, confidence) cached for a page key, or None. confidence may itself be None."""
+        now = time.time()
+        with self._lock:
+            conn = self._connection()
+            row = conn.execute("SELECT text, created, confidence FROM pages WHERE key = ?", (key,)).fetchone()
+            if row is not None and self.ttl and now - row[1] > self.ttl:
+                conn.execute("DELETE FROM pages WHERE key = ?", (key,))
+                conn.commit()
+                row = None
+            if row is None:
+                self.page_misses += 1
+                return None
+            conn.execute("UPDATE pages SET accessed = ? WHERE key = ?", (now, key))
+            conn.commit()
+            self.page_hits += 1
+            return row[0], row[2]
+
+    def put(self, key, text, confidence=None):
+        now = time.time()
+        with self._lock:
+            conn = self._connection()
+            conn.execute(
+                "INSERT OR REPLACE INTO pages (key, text, created, accessed, confidence) VALUES (?, ?, ?, ?, ?)",
+                (key, text, now, now, confidence),
+            )
+            self._puts_since_evict += 1
+            # Amortize eviction instead of counting rows on every insert
+            if self._puts_since_evict >= 100:
+                self._evict(conn, now)
+            conn.commit()
+
+    def _evict(self, conn, now):
+        self._puts_since_evict = 0
+        if self.ttl:
+            conn.execute("DELETE FROM pages WHERE created < ?", (now - self.ttl,))
+        overflow = conn.execute("SELECT COUNT(*) FROM pages").fetchone()[0] - self.max_entries
+        if overflow > 0:
+            conn.execute(
+                "DELETE FROM pages WHERE key IN (SELECT key FROM pages ORDER BY accessed LIMIT ?)",
+                (overflow,),
+            )
+
+    def record_document_lookup(self, hit):
+        if hit:
+            self.document_hits += 1
+        else:
+            self.document_misses += 1
+
+    def stats(self):
+        with self._lock:
+            entries = self._connection().execute("SELECT COUNT(*) FROM pages").fetchone()[0]
+        page_lookups = self.page_hits + self.page_misses
+        document_lookups = self.document_hits + self.document_misses
+        return {
+            "enabled": settings.OCR_CACHE_ENABLED,
+            "entries": entries,
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl,
+            "page_hits": self.page_hits,
+            "page_misses": self.page_misses,
+            "page_hit_rate": self.page_hits / page_lookups if page_lookups else 0.0,
+            "document_hits": self.document_hits,
+            "document_misses": self.document_misses,
+            "document_hit_rate": self.document_hits / document_lookups if document_lookups else 0.0,
+        }
+
+
+ocr_cache = OCRCache(
+    os.path.join(settings.CACHE_DIR, "ocr_cache.sqlite3"),
+    max_entries=settings.OCR_CACHE_MAX_ENTRIES,
+    ttl=settings.OCR_CACHE_TTL,
+)
@@ -1,27 +1,67 @@
-import google.generativeai as genai
-from PIL import Image
-import io
+import base64
 
 from app.core.config import settings
+from app.core.executor import run_in_thread
+from app.services.http_client import get_remote_client
+from app.services.image_io import encode_jpeg, to_pil
+from app.services.rasterizer import render_profile
 
-genai.configure(api_key=settings.GEMINI_API_KEY)
+PROMPT = "Extract all the text from this image."
+MODEL_NAME = 'gemini-2.5-flash'
 
 class OCRService:
+    thread_safe = True
+
     def __init__(self):
-        self.model = genai.GenerativeModel('gemini-2.5-flash')
+        # Imported here so the SDK is only loaded (and configured) by processes that use Gemini
+        import google.generativeai as genai
+
+        genai.configure(api_key=settings.GEMINI_API_KEY)
+        self.model = genai.GenerativeModel(MODEL_NAME)
+        self.url = f"{settings.GEMINI_BASE_URL.rstrip('/')}/v1beta/models/{MODEL_NAME}:generateContent"
 
-    def extract_text(self, image_path):
+    def extract_text(self, image):
         """
-        Sends image path to Google Gemini for text extraction.
+        Sends an image (array, PIL image or path) to Google Gemini for text extraction.
         Returns block of text and lines.
         """
-        # Open image from path
-        img = Image.open(image_path)
+        img = to_pil(image)
         
         # Generate content with image
-        response = self.model.generate_content(["Extract all the text from this image.", img])
+        response = self.model.generate_content([PROMPT, img])
         
         full_text = response.text
         lines = full_text.split('\n')
         
-        return full_text, lines
\ No newline at end of file
+        return full_text, lines
+
+    @staticmethod
+    def _build_request(image):
+        jpeg = encode_jpeg(image, render_profile("gemini")["jpeg_quality"])
+        return {
+            "contents": [{
+                "parts": [
+                    {"text": PROMPT},
+                    {"inline_data": {"mime_type": "image/jpeg", "data": base64.b64encode(jpeg).decode('utf-8')}},
+                ]
+            }]
+        }
+
+    async def extract_text_async(self, image):
+        """
+        Async variant of extract_text() used by the pipeline. Calls the Gemini REST endpoint through the
+        pooled, rate-limited, retrying client instead of blocking a thread on the SDK.
+        """
+        data = await run_in_thread(self._build_request, image)
+        result = await get_remote_client("gemini").post_json(
+            self.url, data, headers={"x-goog-api-key": settings.GEMINI_API_KEY}
+        )
+
+        candidates = result.get("candidates") or []
+        if not candidates:
+            raise ValueError(f"No candidates in response: {result}")
+        parts = candidates[0].get("content", {}).get("parts", [])
+        full_text = "".join(part.get("text", "") for part in parts)
+        lines = full_text.split('\n')
+
+        return full_text, lines
@@ -1,41 +1,45 @@
-from paddleocr import PaddleOCR
-import cv2
+from app.services.image_io import to_bgr_array
 
 class PaddleService:
     def __init__(self):
+        # Imported here so paddle is only loaded by processes that use this engine
+        from paddleocr import PaddleOCR
+
         # Initialize PaddleOCR with English
         self.ocr = PaddleOCR(use_angle_cls=True, lang='en')
 
-    def extract_text(self, image_path):
+    def extract_text(self, image):
         """
-        Extracts text from image path using PaddleOCR.
+        Extracts text from an image (array, PIL image or path) using PaddleOCR.
         Returns block of text and lines.
         """
-        # Load image with OpenCV
-        img = cv2.imread(image_path)
-        if img is None:
-            raise ValueError(f"Could not load image from {image_path}")
-        
-        # Resize if too large (PaddleOCR recommends images under 3000px)
-        if img.shape[0] > 3000 or img.shape[1] > 3000:
-            scale = min(3000 / img.shape[0], 3000 / img.shape[1])
-            new_width = int(img.shape[1] * scale)
-            new_height = int(img.shape[0] * scale)
-            img = cv2.resize(img, (new_width, new_height))
+        full_text, lines, _ = self.extract_text_scored(image)
+        return full_text, lines
+
+    def extract_text_scored(self, image):
+        """
+        Like extract_text(), plus the page confidence (0-100): the mean recognition score of its lines,
+        or None when nothing was recognized.
+        """
+        # Pages arrive already sized for PaddleOCR (max_edge in its render profile)
+        img = to_bgr_array(image)
         
         # Perform OCR (PaddleOCR expects BGR format from OpenCV)
         results = self.ocr.ocr(img)
         
         lines = []
+        scores = []
         full_text = ""
         
         if results and isinstance(results[0], list):
             for res in results[0]:
                 try:
-                    text = res[1][0]
+                    text, score = res[1][0], res[1][1]
                     lines.append(text)
+                    scores.append(float(score) * 100)
                     full_text += text + "\n"
                 except (IndexError, TypeError):
                     continue
         
-        return full_text.strip(), lines
\ No newline at end of file
+        confidence = sum(scores) / len(scores) if scores else None
+        return full_text.strip(), lines, confidence
\ No newline at end of file
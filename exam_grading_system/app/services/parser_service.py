@@ -1,49 +1,134 @@
 import re
 from app.models.schemas import QuestionData, SubAnswer
 
+SUB_LABEL = r"x{0,3}(?:ix|iv|v?i{1,3}|v)|x{1,3}|[a-h]"  # roman numeral up to xxxix, or a letter a-h
+
+# One compiled pattern classifies every line in a single match:
+#   header  - "Ans 6", "Answer 6:", "Q6", "Question 6." (answer sheet style headers)
+#   q_no    - "6." or "6)" (numbered question; "1.5" is not one)
+#   sub     - "(i)", "ii)", "(a)", "b)" (roman-numeral or lettered sub-part)
+#   dot_sub - "iv. ...", "b. ..." (lowercase only, followed by text that is not a number)
+# and "rest" is the text after the marker. Every sub-part marker must be followed by whitespace
+# or the end of the line, so prose is left alone: "i.e. all", "I. think", "A. Reading section"
+# and "c. 1850" are ordinary text lines.
+LINE_PATTERN = re.compile(
+    r"""^\s*(?:
+        (?:Ans(?:wer)?|Q(?:uestion)?|Que)\s*[.:\-]?\s*(?P<header>\d+)\s*[.):\-]?
+      | (?P<q_no>\d+)\s*[.)](?!\d)
+      | \(?(?P<sub>""" + SUB_LABEL + r""")\s*\)(?=\s|$)
+      | (?-i:(?P<dot_sub>""" + SUB_LABEL + r"""))\.(?=\s*$|\s+[^\d\s])
+    )\s*(?P<rest>.*)$""",
+    re.IGNORECASE | re.VERBOSE,
+)
+
+
+class QuestionParser:
+    """
+    Incremental single-pass parser from OCR lines to QuestionData:
+    1. A question/answer header starts a new question
+    2. A sub-part marker starts a sub-part of the current question
+    3. Other lines are appended to the current sub-part, or else to the question text
+    Text is collected in lists and joined once per question, so cost is linear in the input.
+    """
+
+    def __init__(self):
+        self._q_no = None
+        self._parts = []
+        self._subparts = []  # (label, parts) pairs
+
+    def feed(self, line):
+        """Consumes one line; returns the previous question when this line closes it, else None."""
+        line = line.strip()
+        if not line:
+            return None
+
+        match = LINE_PATTERN.match(line)
+        if match is None:
+            self._append(line)
+            return None
+
+        q_no = match.group("header") or match.group("q_no")
+        rest = match.group("rest").strip()
+        if q_no is None:
+            if self._q_no is None:
+                # Sub-part marker before any question: skipped like the other lines before it
+                return None
+            label = match.group("sub") or match.group("dot_sub")
+            self._subparts.append((label.lower(), [rest] if rest else []))
+            return None
+
+        finished = self.close()
+        self._q_no = q_no
+        self._parts = [rest] if rest else []
+        return finished
+
+    def _append(self, text):
+        # Lines before the first question (titles, instructions) are skipped
+        if self._q_no is None:
+            return
+        if self._subparts:
+            self._subparts[-1][1].append(text)
+        else:
+            self._parts.append(text)
+
+    def close(self):
+        """Returns the question still being built (or None) and resets the parser."""
+        if self._q_no is None:
+            return None
+        question = QuestionData(
+            q_no=self._q_no,
+            text=" ".join(self._parts),
+            subparts=[SubAnswer(label=label, text=" ".join(parts)) for label, parts in self._subparts],
+        )
+        self._q_no = None
+        self._parts = []
+        self._subparts = []
+        return question
+
+
+def iter_questions(text_lines):
+    """Streams QuestionData from any iterable of lines (e.g. a generator fed as pages finish)."""
+    parser = QuestionParser()
+    for line in text_lines:
+        question = parser.feed(line)
+        if question is not None:
+            yield question
+    question = parser.close()
+    if question is not None:
+        yield question
+
+
+def merge_answers(questions):
+    """
+    Combines answers that were continued under a repeated header ("Q6" ... "Q6 contd"),
+    keeping the order in which each answer first appeared.
+    """
+    answers = {}
+    texts = {}  # q_no -> text parts, joined once at the end
+    for question in questions:
+        existing = answers.get(question.q_no)
+        if existing is None:
+            answers[question.q_no] = question
+            texts[question.q_no] = [question.text] if question.text else []
+            continue
+        if question.text:
+            texts[question.q_no].append(question.text)
+        existing.subparts.extend(question.subparts)
+    for q_no, question in answers.items():
+        question.text = " ".join(texts[q_no])
+    return list(answers.values())
+
+
 def parse_question_paper(text_lines):
     """
     Parses 2_1_1_English L & L.pdf structure
     """
-    questions = []
-    current_q = None
-    
-    # Regex for "1. Text..."
-    q_pattern = re.compile(r'^\s*(\d+)\.\s*(.*)')
-    
-    for line in text_lines:
-        match = q_pattern.match(line)
-        if match:
-            # Save previous if exists
-            if current_q:
-                questions.append(current_q)
-            current_q = QuestionData(q_no=match.group(1), text=match.group(2))
-        elif current_q:
-            # Append text to current question (simplified)
-            current_q.text += " " + line
-            
-    if current_q:
-        questions.append(current_q)
-    return questions
+    return list(iter_questions(text_lines))
+
 
 def parse_answer_sheet(text_lines):
     """
     Parses eng_1.pdf (Handwritten)
-    Pattern: Q6 or 6 or Ans 6
+    Pattern: Q6 or 6) or Ans 6, with (i)/(a) style sub-answers
     """
-    answers = {}
-    # Regex for "Ans 6", "Q6", "Question 6", or just "6" at start
-    ans_pattern = re.compile(r'^\s*(?:Ans\s*|Q\s*|Question\s*)?(\d+)', re.IGNORECASE)
-    
-    for line in text_lines:
-        match = ans_pattern.match(line.strip())
-        if match:
-            q_no = match.group(1)
-            if q_no not in answers:
-                answers[q_no] = QuestionData(
-                    q_no=q_no, 
-                    text=line.strip(),
-                    subparts=[]
-                )
-            
-    return list(answers.values())
\ No newline at end of file
+    return merge_answers(iter_questions(text_lines))
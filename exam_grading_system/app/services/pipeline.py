@@ -0,0 +1,95 @@
+import asyncio
+import time
+
+from app.core.executor import run_in_thread
+from app.services.engine_registry import engine_registry
+from app.services.image_io import save_debug_image
+from app.services.image_processing import preprocess_handwriting
+
+# Each OCR'd page is reported as a dict: {"text", "confidence", "preprocess_s", "preprocess_stages", "ocr_s"}
+# (plus "cached" for cache hits). confidence (0-100) is None for engines that don't report one.
+
+
+def prepare_page(ocr_engine, doc_type, image, debug_name=None, timings=None):
+    """
+    Applies the preprocessing the engine/doc_type combination needs (debug copies optional).
+    Per-stage preprocessing seconds are written to `timings` when a dict is given.
+    """
+    if debug_name:
+        save_debug_image(image, f"{debug_name}.png")
+
+    # Pre-process if Handwritten Answer Sheet (removes lines, increases contrast)
+    if doc_type == "answer_sheet" and ocr_engine != 'paddle':
+        image = preprocess_handwriting(image, timings)
+        if debug_name:
+            save_debug_image(image, f"{debug_name}_processed.png")
+    return image
+
+
+def _recognize(ocr_service, image):
+    """(text, confidence) from an engine, using extract_text_scored() when the engine has it."""
+    if hasattr(ocr_service, "extract_text_scored"):
+        page_text, _, confidence = ocr_service.extract_text_scored(image)
+        return page_text, confidence
+    page_text, _ = ocr_service.extract_text(image)
+    return page_text, None
+
+
+def _timed_prepare(ocr_engine, doc_type, image, debug_name):
+    started = time.perf_counter()
+    stages = {}
+    image = prepare_page(ocr_engine, doc_type, image, debug_name, stages)
+    return image, {"preprocess_s": time.perf_counter() - started, "preprocess_stages": stages}
+
+
+def ocr_page(ocr_engine, doc_type, image, debug_name=None):
+    """
+    Pre-processes and OCRs a single in-memory page image.
+    Runs inside an executor worker, using that worker's warm engine.
+    """
+    image, timing = _timed_prepare(ocr_engine, doc_type, image, debug_name)
+    started = time.perf_counter()
+    with engine_registry.acquire(ocr_engine) as ocr_service:
+        page_text, confidence = _recognize(ocr_service, image)
+    return {"text": page_text, "confidence": confidence, **timing, "ocr_s": time.perf_counter() - started}
+
+
+def ocr_pages(ocr_engine, doc_type, images, debug_names):
+    """
+    Pre-processes and OCRs several pages in one executor call.
+    Uses the engine's extract_text_batch() when it has one; returns page results in order.
+    """
+    prepared = [
+        _timed_prepare(ocr_engine, doc_type, image, debug_name)
+        for image, debug_name in zip(images, debug_names)
+    ]
+    started = time.perf_counter()
+    with engine_registry.acquire(ocr_engine) as ocr_service:
+        if hasattr(ocr_service, "extract_text_batch"):
+            batch = ocr_service.extract_text_batch([image for image, _ in prepared])
+            # Entries are (text, lines), or (text, lines, confidence) for engines that score their pages
+            results = [(page[0], page[2] if len(page) > 2 else None) for page in batch]
+        else:
+            results = [_recognize(ocr_service, image) for image, _ in prepared]
+    # A batch call has one duration; attribute it evenly to its pages
+    ocr_s = (time.perf_counter() - started) / max(1, len(prepared))
+    return [
+        {"text": page_text, "confidence": confidence, **timing, "ocr_s": ocr_s}
+        for (page_text, confidence), (_, timing) in zip(results, prepared)
+    ]
+
+
+async def ocr_pages_async(ocr_engine, doc_type, images, debug_names):
+    """
+    OCRs pages with an engine that has extract_text_async() (the remote VLMs).
+    Preprocessing runs on the thread pool; the HTTP calls run concurrently on the event loop.
+    """
+    ocr_service = await run_in_thread(engine_registry.get, ocr_engine)
+
+    async def one(image, debug_name):
+        image, timing = await run_in_thread(_timed_prepare, ocr_engine, doc_type, image, debug_name)
+        started = time.perf_counter()
+        page_text, _ = await ocr_service.extract_text_async(image)
+        return {"text": page_text, "confidence": None, **timing, "ocr_s": time.perf_counter() - started}
+
+    return list(await asyncio.gather(*(one(image, name) for image, name in zip(images, debug_names))))
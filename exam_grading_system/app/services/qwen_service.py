@@ -1,57 +1,74 @@
 import requests
-from PIL import Image
 import base64
-from io import BytesIO
 from app.core.config import settings
+from app.services.image_io import encode_jpeg
+from app.services.rasterizer import render_profile
+from app.services.http_client import get_remote_client
+from app.core.executor import run_in_thread
+
+PROMPT = "Extract all the text from this image."
+
+# Keep-alive session for the synchronous path so pages reuse one TLS connection
+_session = requests.Session()
 
 class QwenService:
+    thread_safe = True
+
     def __init__(self):
         self.model = "qwen/qwen2.5-vl-32b-instruct"
         self.api_key = settings.OPENROUTER_API_KEY
-
-    def extract_text(self, image_path):
-        """
-        Sends image path to Qwen-2.5-VL via OpenRouter for text extraction.
-        Returns block of text and lines.
-        """
-        # Open image from path
-        img = Image.open(image_path)
-        
-        # Convert to base64
-        buffer = BytesIO()
-        img.save(buffer, format="JPEG")
-        img_base64 = base64.b64encode(buffer.getvalue()).decode('utf-8')
-        
-        # API call
-        url = "https://openrouter.ai/api/v1/chat/completions"
-        headers = {
+        self.url = f"{settings.OPENROUTER_BASE_URL.rstrip('/')}/chat/completions"
+        self.headers = {
             "Authorization": f"Bearer {self.api_key}",
             "Content-Type": "application/json"
         }
-        data = {
+
+    def _build_request(self, image):
+        # Convert to base64
+        jpeg = encode_jpeg(image, render_profile("qwen")["jpeg_quality"])
+        img_base64 = base64.b64encode(jpeg).decode('utf-8')
+        
+        return {
             "model": self.model,
             "messages": [
                 {
                     "role": "user",
                     "content": [
-                        {"type": "text", "text": "Extract all the text from this image."},
+                        {"type": "text", "text": PROMPT},
                         {"type": "image_url", "image_url": {"url": f"data:image/jpeg;base64,{img_base64}"}}
                     ]
                 }
             ]
         }
-        
-        response = requests.post(url, headers=headers, json=data)
-        
-        if response.status_code != 200:
-            raise ValueError(f"API request failed: {response.status_code} - {response.text}")
-        
-        result = response.json()
-        
+
+    @staticmethod
+    def _parse_response(result):
         if 'choices' not in result or not result['choices']:
             raise ValueError(f"No choices in response: {result}")
         
         full_text = result['choices'][0]['message']['content'] or ""
         lines = full_text.split('\n')
         
-        return full_text, lines
\ No newline at end of file
+        return full_text, lines
+
+    def extract_text(self, image):
+        """
+        Sends an image (array, PIL image or path) to Qwen-2.5-VL via OpenRouter for text extraction.
+        Returns block of text and lines.
+        """
+        data = self._build_request(image)
+        response = _session.post(self.url, headers=self.headers, json=data, timeout=settings.REMOTE_TIMEOUT)
+        
+        if response.status_code != 200:
+            raise ValueError(f"API request failed: {response.status_code} - {response.text}")
+        
+        return self._parse_response(response.json())
+
+    async def extract_text_async(self, image):
+        """
+        Async variant of extract_text() used by the pipeline: JPEG encoding runs on the thread pool
+        and the request goes through the pooled, rate-limited, retrying client.
+        """
+        data = await run_in_thread(self._build_request, image)
+        result = await get_remote_client("qwen").post_json(self.url, data, headers=self.headers)
+        return self._parse_response(result)
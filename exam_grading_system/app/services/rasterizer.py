@@ -0,0 +1,161 @@
+import asyncio
+import threading
+import time
+from collections import namedtuple
+
+import cv2
+import fitz
+import numpy as np
+
+from app.core.config import settings
+from app.core.executor import run_in_thread
+from app.services.image_io import pixmap_to_array
+from app.services.image_processing import find_content
+from app.services.text_layer import extract_text_layer
+
+
+# One page coming out of the rasterizer. source says how its text is obtained:
+#   "ocr"         image is the rendered page (RGB or grayscale array), cropped to `crop` when set
+#   "text_layer"  born-digital page; text was read from the PDF text layer and it was never rendered
+#   "blank"       rendered but found blank; text is "" and no OCR is needed
+# seconds is the time spent on the page.
+PdfPage = namedtuple("PdfPage", ["index", "image", "text", "seconds", "source", "crop"])
+
+
+def render_profile(ocr_engine=None):
+    """Rendering settings for an engine (see RENDER_PROFILES), completed with the defaults."""
+    return {**settings.DEFAULT_RENDER_PROFILE, **settings.RENDER_PROFILES.get(ocr_engine, {})}
+
+
+def render_page(page, profile):
+    """
+    Renders a fitz page at the profile's dpi and colorspace, scaled down so the longest
+    side stays within max_edge. Returns an RGB or grayscale numpy array.
+    """
+    zoom = profile["dpi"] / 72
+    longest = max(page.rect.width, page.rect.height) * zoom
+    if profile["max_edge"] and longest > profile["max_edge"]:
+        zoom *= profile["max_edge"] / longest
+    colorspace = fitz.csGRAY if profile["grayscale"] else fitz.csRGB
+    pix = page.get_pixmap(matrix=fitz.Matrix(zoom, zoom), colorspace=colorspace, alpha=False)
+    # Use the raw samples directly instead of a PNG encode/decode round trip
+    return pixmap_to_array(pix)
+
+
+def rescale_for_engine(image, source_engine, target_engine):
+    """
+    Resizes a page rendered for source_engine to roughly what target_engine's profile would have
+    produced (lower dpi, max_edge cap), e.g. when a cascade sends a page on to another engine.
+    Never upscales.
+    """
+    source, target = render_profile(source_engine), render_profile(target_engine)
+    height, width = image.shape[:2]
+    scale = target["dpi"] / source["dpi"]
+    if target["max_edge"]:
+        scale = min(scale, target["max_edge"] / max(height, width))
+    if scale >= 1:
+        return image
+    size = (max(1, round(width * scale)), max(1, round(height * scale)))
+    return cv2.resize(image, size, interpolation=cv2.INTER_AREA)
+
+
+# PyMuPDF is not thread-safe, and pages are rendered on the shared thread pool for several documents
+# at once: every MuPDF call in this process holds this lock. Blank-page detection runs outside it.
+_mupdf_lock = threading.Lock()
+
+
+def pdf_page_count(file_path):
+    with _mupdf_lock:
+        with fitz.open(file_path) as doc:
+            return doc.page_count
+
+
+def _read_page(doc, page_index, profile):
+    """(text-layer text, None) for born-digital pages, else (None, rendered image); MuPDF work only."""
+    with _mupdf_lock:
+        page = doc.load_page(page_index)
+        text = extract_text_layer(page)
+        image = render_page(page, profile) if text is None else None
+        # Drop the page while the lock is held rather than whenever the frame goes away
+        del page
+    return text, image
+
+
+def iter_pdf_pages(file_path, ocr_engine=None, pages=None):
+    """
+    Lazily renders a PDF with ocr_engine's render profile, one page at a time;
+    only the current page is held in memory.
+    Yields a PdfPage per page (or only for the 0-based indices in `pages`, in order); born-digital pages
+    are read from the text layer and never rendered, blank pages are flagged and mostly empty ones
+    cropped to their content (see find_content()).
+    """
+    profile = render_profile(ocr_engine)
+    with _mupdf_lock:
+        doc = fitz.open(file_path)
+    try:
+        for page_index in (range(doc.page_count) if pages is None else pages):
+            started = time.perf_counter()
+            text, image = _read_page(doc, page_index, profile)
+            if text is not None:
+                yield PdfPage(page_index, None, text, time.perf_counter() - started, "text_layer", None)
+                continue
+            blank, box = False, None
+            if settings.SKIP_BLANK_PAGES or settings.CROP_TO_CONTENT:
+                blank, box = find_content(image)
+            if blank and settings.SKIP_BLANK_PAGES:
+                yield PdfPage(page_index, None, "", time.perf_counter() - started, "blank", None)
+                continue
+            if box is not None and settings.CROP_TO_CONTENT:
+                x0, y0, x1, y1 = box
+                image = np.ascontiguousarray(image[y0:y1, x0:x1])
+            else:
+                box = None
+            yield PdfPage(page_index, image, None, time.perf_counter() - started, "ocr", box)
+    finally:
+        with _mupdf_lock:
+            doc.close()
+
+
+async def stream_pdf_pages(file_path, ocr_engine=None, prefetch=None, pages=None):
+    """
+    Async generator over iter_pdf_pages().
+    Pages are rendered on the thread pool while earlier pages are being OCR'd,
+    staying at most `prefetch` pages ahead of the consumer. The PDF is closed when the stream
+    ends, including when the consumer stops early.
+    """
+    prefetch = settings.RASTER_PREFETCH if prefetch is None else prefetch
+    page_iter = iter_pdf_pages(file_path, ocr_engine, pages)
+    # The generator is advanced on pool threads; closing it must wait for a page still being rendered
+    iter_lock = threading.Lock()
+    queue = asyncio.Queue(maxsize=max(1, prefetch))
+
+    def next_page():
+        with iter_lock:
+            return next(page_iter, None)
+
+    def close_pages():
+        with iter_lock:
+            page_iter.close()
+
+    async def produce():
+        try:
+            while True:
+                item = await run_in_thread(next_page)
+                await queue.put(item)
+                if item is None:
+                    return
+        except Exception as exc:
+            await queue.put(exc)
+
+    producer = asyncio.create_task(produce())
+    try:
+        while True:
+            item = await queue.get()
+            if item is None:
+                return
+            if isinstance(item, Exception):
+                raise item
+            yield item
+    finally:
+        producer.cancel()
+        await run_in_thread(close_pages)
@@ -0,0 +1,169 @@
+import base64
+import gzip
+import json
+import os
+import sqlite3
+import threading
+from datetime import datetime
+
+from app.core.config import settings
+
+_COLUMNS = ("id", "doc_id", "name", "status", "doc_type", "ocr_engine", "timestamp", "ts")
+
+
+def _epoch(timestamp):
+    """ISO 8601 timestamp -> seconds since the epoch (0 if missing or unparsable)."""
+    try:
+        return datetime.fromisoformat(timestamp).timestamp()
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def _filter_epoch(name, timestamp):
+    """Like _epoch(), for the since/until filters: an unparsable timestamp is an error, not 0."""
+    try:
+        return datetime.fromisoformat(timestamp).timestamp()
+    except (TypeError, ValueError):
+        raise ValueError(f"Invalid {name} timestamp {timestamp!r}; expected ISO 8601, e.g. 2024-05-01T09:30:00")
+
+
+def _result_id(file_name):
+    """Result files are addressed by name without extension: the doc_id, or the name of an older file."""
+    for ext in (".json.gz", ".json"):
+        if file_name.endswith(ext):
+            return file_name[:-len(ext)]
+    return file_name
+
+
+def read_result_file(path):
+    """Loads a result file, compressed (.json.gz) or not."""
+    opener = gzip.open if path.endswith(".gz") else open
+    with opener(path, "rt", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _encode_cursor(ts, result_id):
+    return base64.urlsafe_b64encode(json.dumps([ts, result_id]).encode()).decode()
+
+
+def _decode_cursor(cursor):
+    try:
+        ts, result_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return float(ts), str(result_id)
+    except (ValueError, TypeError):
+        raise ValueError("Invalid cursor")
+
+
+class ResultIndex:
+    """
+    Metadata index of the saved result files, kept in SQLite:
+    1. One row per result file, updated whenever a result is written
+    2. Listing reads only the index, so its cost does not depend on result file sizes
+    3. Built from the existing files the first time it is opened
+    """
+
+    def __init__(self, path, results_dir):
+        self.path = path
+        self.results_dir = results_dir
+        self._lock = threading.Lock()
+        self._conn = None
+
+    def _connection(self):
+        if self._conn is None:
+            conn = sqlite3.connect(self.path, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            is_new = conn.execute(
+                "SELECT name FROM sqlite_master WHERE type = 'table' AND name = 'results'"
+            ).fetchone() is None
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS results ("
+                "id TEXT PRIMARY KEY, doc_id TEXT, name TEXT, status TEXT, doc_type TEXT, "
+                "ocr_engine TEXT, timestamp TEXT, ts REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS results_ts ON results (ts, id)")
+            for column in ("status", "doc_type", "ocr_engine"):
+                conn.execute(f"CREATE INDEX IF NOT EXISTS results_{column}_ts ON results ({column}, ts, id)")
+            self._conn = conn
+            if is_new:
+                self._rebuild(conn)
+        return self._conn
+
+    def _row(self, file_name, payload):
+        timestamp = payload.get("timestamp", "")
+        result_id = _result_id(file_name)
+        return (
+            result_id,
+            payload.get("doc_id"),
+            payload.get("display_name") or result_id,
+            payload.get("status", "unknown"),
+            payload.get("doc_type", ""),
+            payload.get("ocr_engine", ""),
+            timestamp,
+            _epoch(timestamp),
+        )
+
+    def _rebuild(self, conn):
+        """One-off migration: index result files written before the index existed."""
+        rows = []
+        for name in os.listdir(self.results_dir):
+            # Temp files of interrupted writes start with a dot and never end in .json
+            if name.startswith(".") or not name.lower().endswith((".json", ".json.gz")):
+                continue
+            try:
+                rows.append(self._row(name, read_result_file(os.path.join(self.results_dir, name))))
+            except Exception as e:
+                print(f"Error indexing result file {name}: {e}")
+        conn.executemany(f"INSERT OR REPLACE INTO results VALUES ({', '.join('?' * len(_COLUMNS))})", rows)
+        conn.commit()
+        print(f"Indexed {len(rows)} saved results")
+
+    def upsert(self, file_name, payload):
+        """Record (or refresh) the metadata of a result file that was just written (keyed by its result id)."""
+        with self._lock:
+            conn = self._connection()
+            conn.execute(
+                f"INSERT OR REPLACE INTO results VALUES ({', '.join('?' * len(_COLUMNS))})",
+                self._row(file_name, payload),
+            )
+            conn.commit()
+
+    def query(self, limit=100, cursor=None, status=None, doc_type=None, ocr_engine=None,
+              since=None, until=None):
+        """
+        Newest-first page of result metadata matching the filters.
+        Returns (rows, next_cursor); next_cursor is None on the last page.
+        """
+        clauses, params = [], []
+        for column, value in (("status", status), ("doc_type", doc_type), ("ocr_engine", ocr_engine)):
+            if value:
+                clauses.append(f"{column} = ?")
+                params.append(value)
+        if since:
+            clauses.append("ts >= ?")
+            params.append(_filter_epoch("since", since))
+        if until:
+            clauses.append("ts <= ?")
+            params.append(_filter_epoch("until", until))
+        if cursor:
+            cursor_ts, cursor_id = _decode_cursor(cursor)
+            clauses.append("(ts < ? OR (ts = ? AND id < ?))")
+            params.extend([cursor_ts, cursor_ts, cursor_id])
+
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        sql = f"SELECT {', '.join(_COLUMNS)} FROM results {where} ORDER BY ts DESC, id DESC LIMIT ?"
+        with self._lock:
+            fetched = self._connection().execute(sql, params + [limit + 1]).fetchall()
+
+        rows = [dict(zip(_COLUMNS, row)) for row in fetched[:limit]]
+        next_cursor = _encode_cursor(rows[-1]["ts"], rows[-1]["id"]) if len(fetched) > limit else None
+        return rows, next_cursor
+
+    def status_counts(self):
+        """Number of indexed results per status (for dashboard totals without listing everything)."""
+        with self._lock:
+            rows = self._connection().execute("SELECT status, COUNT(*) FROM results GROUP BY status").fetchall()
+        return dict(rows)
+
+
+# Derived data (rebuilt from the result files when missing), so it lives with the other caches
+result_index = ResultIndex(os.path.join(settings.CACHE_DIR, "results_index.sqlite3"), settings.RESULTS_DIR)
@@ -0,0 +1,99 @@
+import gzip
+import json
+import os
+import re
+import tempfile
+from datetime import datetime
+
+from app.core.config import settings
+from app.services.result_index import read_result_file, result_index
+
+RESULT_EXTENSIONS = (".json.gz", ".json")
+
+
+def _display_name(payload, now):
+    """Human-readable name for listings: the first question's text or the file name, plus a timestamp."""
+    candidates = []
+    parsed = payload.get("parsed_result")
+    if isinstance(parsed, list) and parsed and isinstance(parsed[0], dict):
+        candidates.append(parsed[0].get("text", "")[:30])
+    if payload.get("filename"):
+        candidates.append(os.path.splitext(payload["filename"])[0][:30])
+    for candidate in candidates:
+        safe_name = re.sub(r'[<>:"/\\|?*]', '', candidate or "").strip()
+        if safe_name:
+            return f"{safe_name}_{now.strftime('%Y%m%d_%H%M%S')}"
+    return payload.get("doc_id", "result")
+
+
+class ResultStore:
+    """
+    Result files addressed by doc_id (<doc_id>.json, or .json.gz when compression is on):
+    1. Written as compact JSON to a temp file and renamed into place, so readers never see a partial file
+    2. Retrieval by doc_id is a direct path lookup; the display name lives in the payload and the index
+    3. Blocking calls; the pipeline runs them on the thread pool
+    """
+
+    def __init__(self, results_dir, compress=False):
+        self.results_dir = results_dir
+        self.compress = compress
+
+    def path_for(self, result_id):
+        return os.path.join(self.results_dir, result_id + (".json.gz" if self.compress else ".json"))
+
+    def save(self, doc_id, payload):
+        """Atomically writes a result under its doc_id and records it in the result index. Returns the path."""
+        now = datetime.now().astimezone()
+        payload.setdefault("doc_id", doc_id)
+        # ISO 8601 with timezone so the frontend can reliably parse local time
+        payload.setdefault("timestamp", now.isoformat())
+        payload.setdefault("display_name", _display_name(payload, now))
+
+        data = json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        if self.compress:
+            data = gzip.compress(data, compresslevel=settings.RESULTS_GZIP_LEVEL)
+
+        path = self.path_for(doc_id)
+        fd, temp_path = tempfile.mkstemp(dir=self.results_dir, prefix=".result-", suffix=".part")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            # mkstemp creates the file owner-only; results are served as static files too
+            os.chmod(temp_path, 0o644)
+            os.replace(temp_path, path)
+        except BaseException:
+            try:
+                os.remove(temp_path)
+            except OSError:
+                pass
+            raise
+
+        # Toggling compression must not leave an older copy behind under the other extension
+        for ext in RESULT_EXTENSIONS:
+            stale = os.path.join(self.results_dir, doc_id + ext)
+            if stale != path and os.path.exists(stale):
+                os.remove(stale)
+        result_index.upsert(os.path.basename(path), payload)
+        return path
+
+    def load(self, result_id):
+        """
+        The stored payload for a doc_id (or the name of an older result file, with or without extension),
+        or None if there is no such result.
+        """
+        if os.path.basename(result_id) != result_id or result_id.startswith("."):
+            return None
+        if result_id.endswith(RESULT_EXTENSIONS):
+            names = [result_id]
+        else:
+            names = [result_id + ext for ext in RESULT_EXTENSIONS]
+        for name in names:
+            path = os.path.join(self.results_dir, name)
+            try:
+                return read_result_file(path)
+            except FileNotFoundError:
+                continue
+        return None
+
+
+result_store = ResultStore(settings.RESULTS_DIR, compress=settings.RESULTS_GZIP)
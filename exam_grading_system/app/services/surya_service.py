@@ -1,26 +1,40 @@
-from surya.recognition import RecognitionPredictor
-from surya.detection import DetectionPredictor
-from surya.foundation import FoundationPredictor
-from surya.foundation import FoundationPredictor
-from PIL import Image
+from app.core.config import settings
+from app.services.image_io import to_pil
 
 class SuryaService:
     def __init__(self):
+        # Imported here so surya (and torch) are only loaded by processes that use this engine
+        from surya.recognition import RecognitionPredictor
+        from surya.detection import DetectionPredictor
+        from surya.foundation import FoundationPredictor
+
         self.predictor = RecognitionPredictor(FoundationPredictor())
+        # One long-lived detector shared by every call instead of a new one per page
+        self.det_predictor = DetectionPredictor()
 
-    def extract_text(self, image_path):
+    def extract_text(self, image):
         """
-        Extracts text from image using Surya OCR (layout-aware).
+        Extracts text from an image (array, PIL image or path) using Surya OCR (layout-aware).
         Returns block of text and lines.
         """
-        # Load image
-        img = Image.open(image_path)
-        
-        # Perform OCR
-        predictions = self.predictor([img], det_predictor=DetectionPredictor())
-        
-        # Extract text
-        full_text = "\n".join(tl.text for p in predictions for tl in p.text_lines)
-        lines = full_text.split('\n')
-        
-        return full_text, lines
\ No newline at end of file
+        return self.extract_text_batch([image])[0]
+
+    def extract_text_batch(self, images):
+        """
+        Runs detection and recognition over several pages in one Surya call.
+        Returns a (text, lines) tuple per image, in input order.
+        """
+        pil_images = [to_pil(image).convert("RGB") for image in images]
+
+        predictions = self.predictor(
+            pil_images,
+            det_predictor=self.det_predictor,
+            detection_batch_size=settings.SURYA_DETECTION_BATCH_SIZE,
+            recognition_batch_size=settings.SURYA_RECOGNITION_BATCH_SIZE,
+        )
+
+        results = []
+        for prediction in predictions:
+            full_text = "\n".join(tl.text for tl in prediction.text_lines)
+            results.append((full_text, full_text.split('\n')))
+        return results
@@ -1,28 +1,71 @@
 import pytesseract
-from PIL import Image
-import io
-import os
-
 from app.core.config import settings
+from app.services.image_io import to_pil
+
+
+def lines_from_words(words):
+    """
+    Rebuilds text lines from recognized words (dicts with "text", "confidence" and a "line" key that
+    changes from one line to the next). Returns (full_text, lines, mean confidence or None).
+    """
+    lines = []
+    current_line = None
+    for word in words:
+        if word["line"] != current_line:
+            lines.append(word["text"])
+            current_line = word["line"]
+        else:
+            lines[-1] += " " + word["text"]
+    confidence = sum(word["confidence"] for word in words) / len(words) if words else None
+    return "\n".join(lines), lines, confidence
+
 
 class TesseractService:
+    # Each call runs its own tesseract process, so one instance can serve many threads
+    thread_safe = True
+
     def __init__(self):
         # Set tesseract path from config
         pytesseract.pytesseract.tesseract_cmd = settings.TESSERACT_CMD
 
-    def extract_text(self, image_path):
+    def extract_text(self, image):
         """
-        Extracts text from image using Tesseract OCR.
+        Extracts text from an image (array, PIL image or path) using Tesseract OCR.
         Returns block of text and lines.
         """
-        # Open image from path
-        img = Image.open(image_path)
-        
+        full_text, lines, _ = self.extract_text_scored(image)
+        return full_text, lines
+
+    def extract_text_scored(self, image):
+        """
+        Like extract_text(), plus the page confidence (0-100): the mean of Tesseract's word confidences,
+        or None when no words were recognized. Text and confidences come from a single image_to_data call.
+        """
+        return lines_from_words(self.extract_words(image))
+
+    def extract_words(self, image):
+        """
+        Recognized words in reading order, each {"text", "confidence" (0-100), "box" (x0, y0, x1, y1), "line"}.
+        """
+        img = to_pil(image)
+
         # Custom config for better accuracy
         custom_config = r'--oem 3 --psm 6'
-        
-        # Extract text
-        full_text = pytesseract.image_to_string(img, config=custom_config)
-        lines = full_text.split('\n')
-        
-        return full_text, lines
\ No newline at end of file
+
+        data = pytesseract.image_to_data(img, lang=settings.TESSERACT_LANG, config=custom_config,
+                                         output_type=pytesseract.Output.DICT)
+
+        # conf is -1 for non-word entries (blocks, paragraphs, lines)
+        words = []
+        for i, text in enumerate(data["text"]):
+            confidence = float(data["conf"][i])
+            if confidence < 0 or not text.strip():
+                continue
+            left, top = data["left"][i], data["top"][i]
+            words.append({
+                "text": text,
+                "confidence": confidence,
+                "box": (left, top, left + data["width"][i], top + data["height"][i]),
+                "line": (data["block_num"][i], data["par_num"][i], data["line_num"][i]),
+            })
+        return words
@@ -0,0 +1,101 @@
+import os
+import threading
+import time
+
+import numpy as np
+
+from app.core.config import settings
+from app.services.image_io import to_rgb_array
+from app.services.tesseract_service import lines_from_words
+
+
+class TesserocrService:
+    """
+    Tesseract through its C++ API (tesserocr) instead of a tesseract process per page:
+    1. Each thread keeps its own initialized API handle, so the traineddata is loaded once per thread
+    2. Pages are handed over as in-memory pixel buffers; nothing is written to disk
+    3. extract_text_batch() recognizes several pages of a document in one call on the same handle
+    Output matches TesseractService (--oem 3 --psm 6), including word boxes and confidences.
+    """
+
+    # One handle per thread; tesserocr releases the GIL while recognizing, so threads run in parallel
+    thread_safe = True
+
+    def __init__(self):
+        # Tesseract's OpenMP threads would oversubscribe the cores next to our own page parallelism;
+        # libgomp reads this when it is loaded, so it must be set before the import
+        os.environ.setdefault("OMP_THREAD_LIMIT", "1")
+        # Imported here so the optional tesserocr package is only needed by processes that use this engine
+        import tesserocr
+
+        self._tesserocr = tesserocr
+        self._api_args = {"lang": settings.TESSERACT_LANG, "psm": tesserocr.PSM.SINGLE_BLOCK,
+                          "oem": tesserocr.OEM.DEFAULT}
+        if settings.TESSDATA_PREFIX:
+            self._api_args["path"] = settings.TESSDATA_PREFIX
+        self._local = threading.local()
+        # Fail at load time, not on the first page, if the language data is missing
+        self._api()
+
+    def _api(self):
+        """This thread's API handle, initialized on first use."""
+        api = getattr(self._local, "api", None)
+        if api is None:
+            started = time.perf_counter()
+            api = self._tesserocr.PyTessBaseAPI(**self._api_args)
+            print(f"Initialized Tesseract API for {threading.current_thread().name} "
+                  f"in {time.perf_counter() - started:.2f}s")
+            self._local.api = api
+        return api
+
+    def extract_text(self, image):
+        """
+        Extracts text from an image (array, PIL image or path) using Tesseract OCR.
+        Returns block of text and lines.
+        """
+        full_text, lines, _ = self.extract_text_scored(image)
+        return full_text, lines
+
+    def extract_text_scored(self, image):
+        """Like extract_text(), plus the mean word confidence (0-100), or None when no words were recognized."""
+        return lines_from_words(self.extract_words(image))
+
+    def extract_text_batch(self, images):
+        """
+        Recognizes the pages of a document one after another on this thread's handle, in a single call.
+        Returns a (text, lines, confidence) tuple per image, in input order.
+        """
+        return [lines_from_words(self.extract_words(image)) for image in images]
+
+    def extract_words(self, image):
+        """
+        Recognized words in reading order, each {"text", "confidence" (0-100), "box" (x0, y0, x1, y1), "line"}.
+        """
+        tesserocr = self._tesserocr
+        pixels = np.ascontiguousarray(to_rgb_array(image))
+        height, width = pixels.shape[:2]
+        channels = 1 if pixels.ndim == 2 else pixels.shape[2]
+
+        api = self._api()
+        try:
+            api.SetImageBytes(pixels.tobytes(), width, height, channels, width * channels)
+            api.Recognize()
+            iterator = api.GetIterator()
+            words = []
+            if iterator is None:
+                return words
+            word_level, line_level = tesserocr.RIL.WORD, tesserocr.RIL.TEXTLINE
+            line = -1
+            for result in tesserocr.iterate_level(iterator, word_level):
+                if result.IsAtBeginningOf(line_level):
+                    line += 1
+                text = result.GetUTF8Text(word_level)
+                box = result.BoundingBox(word_level)
+                if not text or not text.strip() or box is None:
+                    continue
+                words.append({"text": text, "confidence": float(result.Confidence(word_level)),
+                              "box": tuple(box), "line": line})
+            return words
+        finally:
+            # Drops this page's image and results; the loaded model stays
+            api.Clear()
@@ -0,0 +1,56 @@
+from app.core.config import settings
+
+# Fonts used for the invisible text layer that scanners/OCR tools lay over page images;
+# that text is someone else's OCR output, so the page is treated as scanned
+_OCR_LAYER_FONTS = ("glyphless",)
+
+
+def text_layer_stats(page):
+    """
+    Measures how usable a fitz page's embedded text layer is:
+    1. chars: non-whitespace characters in the text layer
+    2. font_coverage: share of those characters drawn with a real font and mapped to Unicode
+    3. image_ratio: share of the page area covered by images
+    """
+    chars = covered = 0
+    for block in page.get_text("dict")["blocks"]:
+        if block["type"] != 0:
+            continue
+        for line in block["lines"]:
+            for span in line["spans"]:
+                span_chars = sum(1 for ch in span["text"] if not ch.isspace())
+                chars += span_chars
+                if not span["font"].lower().startswith(_OCR_LAYER_FONTS):
+                    covered += span_chars - span["text"].count("�")
+
+    page_area = abs(page.rect) or 1.0
+    image_area = 0.0
+    for info in page.get_image_info():
+        bbox = page.rect & info["bbox"]
+        if not bbox.is_empty:
+            image_area += abs(bbox)
+
+    return {
+        "chars": chars,
+        "font_coverage": covered / chars if chars else 0.0,
+        "image_ratio": min(1.0, image_area / page_area),
+    }
+
+
+def is_digital_page(stats):
+    """True when the text layer can be used as is instead of OCR'ing the rendered page."""
+    return (
+        stats["chars"] >= settings.TEXT_LAYER_MIN_CHARS
+        and stats["font_coverage"] >= settings.TEXT_LAYER_MIN_FONT_COVERAGE
+        and stats["image_ratio"] <= settings.TEXT_LAYER_MAX_IMAGE_RATIO
+    )
+
+
+def extract_text_layer(page):
+    """
+    Returns the page text straight from the PDF text layer, or None if the page needs OCR.
+    Text is read in visual order (top-to-bottom, left-to-right), like OCR output.
+    """
+    if not settings.TEXT_LAYER_FAST_PATH or not is_digital_page(text_layer_stats(page)):
+        return None
+    return page.get_text("text", sort=True)
@@ -0,0 +1,141 @@
+import asyncio
+import hashlib
+import os
+import tempfile
+import zipfile
+
+from app.core.config import settings
+from app.core.executor import run_in_thread
+from app.core.metrics import UPLOADS_IN_PROGRESS
+
+ARCHIVE_EXTENSIONS = (".zip",)
+
+
+class UploadRejected(ValueError):
+    """An upload (or archive member) that can't be accepted, e.g. too many files."""
+
+
+def _open_temp_file():
+    fd, temp_path = tempfile.mkstemp(dir=settings.UPLOAD_DIR, prefix=".upload-", suffix=".part")
+    return os.fdopen(fd, "wb"), temp_path
+
+
+def _finalize(temp_path, digest, filename):
+    """
+    Moves a fully written temp file to its content-derived name: <sha256><ext>.
+    Identical uploads map to the same file, and different uploads sharing a name never clobber each other.
+    """
+    content_hash = digest.hexdigest()
+    ext = os.path.splitext(filename or "")[1].lower() or ".pdf"
+    final_path = os.path.join(settings.UPLOAD_DIR, f"{content_hash}{ext}")
+    os.replace(temp_path, final_path)
+    return {"filename": os.path.basename(filename or final_path), "path": final_path, "content_hash": content_hash}
+
+
+async def save_upload(upload):
+    """
+    Streams an UploadFile to UPLOAD_DIR in chunks without blocking the event loop,
+    hashing it on the way. Returns {"filename", "path", "content_hash"}.
+    """
+    UPLOADS_IN_PROGRESS.inc()
+    digest = hashlib.sha256()
+    out, temp_path = await run_in_thread(_open_temp_file)
+    try:
+        try:
+            while True:
+                chunk = await upload.read(settings.UPLOAD_CHUNK_SIZE)
+                if not chunk:
+                    break
+                digest.update(chunk)
+                await run_in_thread(out.write, chunk)
+        finally:
+            await run_in_thread(out.close)
+        return await run_in_thread(_finalize, temp_path, digest, upload.filename)
+    except BaseException:
+        await run_in_thread(_remove_quietly, temp_path)
+        raise
+    finally:
+        UPLOADS_IN_PROGRESS.dec()
+
+
+def _remove_quietly(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+def _extract_member(archive, info):
+    """Copies one archive member to UPLOAD_DIR in chunks (runs on the thread pool)."""
+    digest = hashlib.sha256()
+    out, temp_path = _open_temp_file()
+    try:
+        with out, archive.open(info) as member:
+            for chunk in iter(lambda: member.read(settings.UPLOAD_CHUNK_SIZE), b""):
+                digest.update(chunk)
+                out.write(chunk)
+        return _finalize(temp_path, digest, info.filename)
+    except BaseException:
+        _remove_quietly(temp_path)
+        raise
+
+
+def _archive_members(archive):
+    """PDF members of an archive, skipping directories and OS metadata (e.g. __MACOSX/)."""
+    members = []
+    for info in archive.infolist():
+        name = info.filename
+        if info.is_dir() or name.startswith("__MACOSX/") or os.path.basename(name).startswith("."):
+            continue
+        if name.lower().endswith(".pdf"):
+            members.append(info)
+    if len(members) > settings.BATCH_MAX_FILES:
+        raise UploadRejected(f"A batch can contain at most {settings.BATCH_MAX_FILES} documents")
+    if sum(info.file_size for info in members) > settings.ARCHIVE_MAX_UNCOMPRESSED_BYTES:
+        raise UploadRejected("Archive is too large once extracted")
+    return members
+
+
+def _extract_archive(upload_file):
+    # UploadFile spools to a seekable temp file, so the archive is read in place without another copy
+    upload_file.seek(0)
+    with zipfile.ZipFile(upload_file) as archive:
+        return [_extract_member(archive, info) for info in _archive_members(archive)]
+
+
+async def save_archive(upload):
+    """Extracts the PDFs of an uploaded ZIP archive to UPLOAD_DIR; returns one entry per PDF."""
+    UPLOADS_IN_PROGRESS.inc()
+    try:
+        return await run_in_thread(_extract_archive, upload.file)
+    except zipfile.BadZipFile:
+        raise UploadRejected(f"{upload.filename} is not a valid ZIP archive")
+    finally:
+        UPLOADS_IN_PROGRESS.dec()
+
+
+def is_archive(upload):
+    return (upload.filename or "").lower().endswith(ARCHIVE_EXTENSIONS) or upload.content_type in (
+        "application/zip", "application/x-zip-compressed"
+    )
+
+
+async def save_batch(uploads):
+    """
+    Saves a batch of uploads concurrently (at most UPLOAD_CONCURRENCY files at once), expanding ZIP archives.
+    Returns the saved entries in upload order.
+    """
+    if len(uploads) > settings.BATCH_MAX_FILES:
+        raise UploadRejected(f"A batch can contain at most {settings.BATCH_MAX_FILES} documents")
+    semaphore = asyncio.Semaphore(max(1, settings.UPLOAD_CONCURRENCY))
+
+    async def save_one(upload):
+        async with semaphore:
+            if is_archive(upload):
+                return await save_archive(upload)
+            return [await save_upload(upload)]
+
+    saved = [entry for entries in await asyncio.gather(*(save_one(u) for u in uploads)) for entry in entries]
+    if len(saved) > settings.BATCH_MAX_FILES:
+        raise UploadRejected(f"A batch can contain at most {settings.BATCH_MAX_FILES} documents")
+    return saved
@@ -0,0 +1,135 @@
+"""
+Standalone OCR worker: claims jobs from the MongoDB-backed queue and processes them.
+
+    python -m app.worker --concurrency 4 [--metrics-port 9100]
+
+Run as many worker processes (on as many nodes) as needed; they coordinate through job leases,
+so API replicas and OCR capacity scale independently. The API process also runs an embedded
+worker unless RUN_EMBEDDED_WORKER is disabled.
+"""
+import argparse
+import asyncio
+import os
+import socket
+
+from app.core.startup import startup_profile
+from app.core import job_queue
+from app.core.config import settings
+from app.core.database import connect_to_mongo, close_mongo_connection
+from app.core.events import event_bus
+from app.core.executor import shutdown_executors
+from app.core.metrics import JOB_RETRIES, JOBS_IN_FLIGHT, start_metrics_server
+from app.services.engine_registry import engine_registry
+from app.services.document_processor import process_document, record_failure
+
+
+class EmbeddedWorkers:
+    task: asyncio.Task = None
+
+
+embedded_workers = EmbeddedWorkers()
+
+
+async def _heartbeat(job_id, worker_id):
+    """Keep extending the lease while the job is being processed."""
+    interval = max(1.0, settings.JOB_VISIBILITY_TIMEOUT / 3)
+    while True:
+        await asyncio.sleep(interval)
+        if not await job_queue.extend_lease(job_id, worker_id):
+            print(f"Worker {worker_id} lost the lease on {job_id}")
+            return
+
+
+async def run_job(job, worker_id):
+    """Process one claimed job, then complete it, schedule a retry or record the final failure."""
+    doc_id = str(job["_id"])
+    args = (doc_id, job["file_path"], job["doc_type"], job["ocr_engine"])
+    attempts = job.get("attempts", 1)
+
+    # Previous holders crashed or timed out on this job too many times
+    if attempts > settings.JOB_MAX_ATTEMPTS:
+        await record_failure(*args, job.get("last_error") or "Exceeded retry limit")
+        await job_queue.complete_job(doc_id, worker_id)
+        return
+
+    heartbeat = asyncio.create_task(_heartbeat(doc_id, worker_id))
+    JOBS_IN_FLIGHT.inc()
+    try:
+        await process_document(*args, job.get("use_cache", True), job.get("page_range"))
+    except job_queue.PermanentJobError as e:
+        print(f"Error processing {doc_id} (not retried): {e}")
+        await record_failure(*args, str(e))
+        await job_queue.complete_job(doc_id, worker_id)
+    except Exception as e:
+        print(f"Error processing {doc_id} (attempt {attempts}/{settings.JOB_MAX_ATTEMPTS}): {e}")
+        if attempts < settings.JOB_MAX_ATTEMPTS:
+            await job_queue.retry_job(doc_id, worker_id, str(e), attempts)
+            event_bus.publish(doc_id, "retrying", attempt=attempts, error=str(e))
+            JOB_RETRIES.inc(engine=engine_registry.resolve(job["ocr_engine"]))
+        else:
+            await record_failure(*args, str(e))
+            await job_queue.complete_job(doc_id, worker_id)
+    else:
+        await job_queue.complete_job(doc_id, worker_id)
+    finally:
+        JOBS_IN_FLIGHT.dec()
+        heartbeat.cancel()
+
+
+async def worker_loop(worker_id):
+    """Claim and run jobs forever, polling while the queue is empty."""
+    while True:
+        try:
+            job = await job_queue.claim_job(worker_id)
+        except Exception as e:
+            print(f"Worker {worker_id} could not claim a job: {e}")
+            job = None
+        if job is None:
+            await asyncio.sleep(settings.JOB_POLL_INTERVAL)
+            continue
+        await run_job(job, worker_id)
+
+
+async def run_workers(concurrency):
+    """Run `concurrency` claim loops, i.e. up to that many documents at once in this process."""
+    base_id = f"{socket.gethostname()}:{os.getpid()}"
+    await asyncio.gather(*(worker_loop(f"{base_id}:{i}") for i in range(concurrency)))
+
+
+async def start_embedded_workers():
+    """Startup hook: process jobs inside the API process unless dedicated workers are used."""
+    if settings.RUN_EMBEDDED_WORKER and embedded_workers.task is None:
+        embedded_workers.task = asyncio.create_task(run_workers(settings.WORKER_CONCURRENCY))
+
+
+async def stop_embedded_workers():
+    """Shutdown hook. Interrupted jobs are picked up again once their lease expires."""
+    if embedded_workers.task is not None:
+        embedded_workers.task.cancel()
+        embedded_workers.task = None
+
+
+async def main(concurrency, metrics_port=None):
+    if metrics_port:
+        start_metrics_server(metrics_port)
+        print(f"Serving metrics on port {metrics_port}")
+    startup_profile.mark("import")
+    await connect_to_mongo()
+    startup_profile.mark("connect")
+    startup_profile.report(engines_imported=engine_registry.imported() or "none")
+    try:
+        print(f"OCR worker started with concurrency {concurrency}")
+        await run_workers(concurrency)
+    finally:
+        shutdown_executors()
+        await close_mongo_connection()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run OCR queue workers")
+    parser.add_argument("--concurrency", type=int, default=settings.WORKER_CONCURRENCY,
+                        help="documents processed at once by this process")
+    parser.add_argument("--metrics-port", type=int, default=None,
+                        help="serve Prometheus metrics for this worker on the given port")
+    args = parser.parse_args()
+    asyncio.run(main(args.concurrency, args.metrics_port))
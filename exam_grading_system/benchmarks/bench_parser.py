@@ -0,0 +1,100 @@
+"""
+Parser throughput benchmark.
+
+    python -m benchmarks.bench_parser --sizes 1000 10000 100000
+
+Times the question-paper and answer-sheet parsers on synthetic OCR output of growing size,
+both as many short questions and as one very long question (the case that used to grow
+quadratically). Lines per second should stay roughly flat as the input grows.
+Before timing, it checks how the parser classifies the marker examples below.
+"""
+import argparse
+import time
+
+from app.services.parser_service import LINE_PATTERN, parse_answer_sheet, parse_question_paper
+
+# line -> the marker group it should match ("header", "q_no", "sub", "dot_sub"), or None for plain text
+MARKER_EXAMPLES = {
+    "Ans 6 The theme": "header",
+    "Q6": "header",
+    "6) The poet": "q_no",
+    "1.5 marks": None,
+    "(ii) First point": "sub",
+    "b) second point": "sub",
+    "iv. fourth point": "dot_sub",
+    "i.e. all of them": None,
+    "I. think the poet means": None,
+    "A. Reading section": None,
+    "c. 1850 the railways": None,
+}
+
+
+def check_markers():
+    for line, expected in MARKER_EXAMPLES.items():
+        match = LINE_PATTERN.match(line)
+        found = next((name for name in ("header", "q_no", "sub", "dot_sub") if match and match.group(name)), None)
+        assert found == expected, f"{line!r}: expected {expected}, parsed as {found}"
+
+
+def many_questions(n_lines):
+    """Question paper style: a header, three sub-parts and filler text every 8 lines."""
+    lines = []
+    q_no = 0
+    while len(lines) < n_lines:
+        q_no += 1
+        lines.append(f"{q_no}. Read the passage below and answer the questions that follow.")
+        lines.append("The quick brown fox jumps over the lazy dog near the river bank.")
+        for label in ("i", "ii", "iii"):
+            lines.append(f"({label}) What does the author suggest about the fox?")
+            lines.append("Explain with reference to the passage.")
+        lines.append("")
+    return lines[:n_lines]
+
+
+def one_long_question(n_lines):
+    """A single question whose text runs for n_lines lines."""
+    return ["1. Write an essay on the topic below."] + [
+        "handwritten answer text continues on this line of the page" for _ in range(n_lines - 1)
+    ]
+
+
+def answer_sheet(n_lines):
+    """Answer sheet style headers (Ans N / QN), sub-answers and repeated headers."""
+    lines = []
+    q_no = 0
+    while len(lines) < n_lines:
+        q_no += 1
+        lines.append(f"Ans {q_no} The theme of the poem is nature.")
+        lines.append("(a) first point of the answer")
+        lines.append("more words of the first point")
+        lines.append("(b) second point of the answer")
+        lines.append(f"Q{max(1, q_no - 1)} contd an addition to the previous answer")
+    return lines[:n_lines]
+
+
+def bench(name, parse, lines, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        # Feed a generator, as the pipeline does while pages are still being OCR'd
+        parsed = parse(line for line in lines)
+        best = min(best, time.perf_counter() - started)
+    print(f"{name:<22} {len(lines):>9} {len(parsed):>9} {best * 1000:>10.2f} {len(lines) / best:>14,.0f}")
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="Benchmark the question/answer parser")
+    arg_parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 10_000, 100_000])
+    arg_parser.add_argument("--repeat", type=int, default=3, help="runs per case; the best is reported")
+    args = arg_parser.parse_args()
+
+    check_markers()
+    print(f"{'case':<22} {'lines':>9} {'items':>9} {'ms':>10} {'lines/s':>14}")
+    for size in args.sizes:
+        bench("question_paper", parse_question_paper, many_questions(size), args.repeat)
+        bench("long_question", parse_question_paper, one_long_question(size), args.repeat)
+        bench("answer_sheet", parse_answer_sheet, answer_sheet(size), args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,256 @@
+"""
+End-to-end pipeline benchmark on synthetic PDFs.
+
+    python -m benchmarks.bench_pipeline --kinds digital scanned handwriting booklet --pages 1 10 100 \\
+        --engines tesseract gemini surya --output bench.json [--baseline previous.json]
+
+Runs the real pipeline (rasterizer, text-layer fast path, preprocessing, scheduling, parser and the
+result file write) on generated PDFs. Tesseract, through pytesseract and tesserocr, is real (each is
+skipped when it is not installed); Gemini, Qwen, Paddle and Surya are deterministic stubs with a fixed
+per-page latency. MongoDB is not used.
+
+Per case it reports:
+1. Stage times (rasterize, preprocess, ocr, parse, persist), summed over pages from the pipeline's
+   progress events; stages overlap, so they can add up to more than the wall time
+2. Wall time, CPU time of this process, peak RSS and pages/sec
+3. Pages read from the text layer and blank pages skipped before OCR (in the JSON)
+Results are written as JSON; --baseline prints the pages/sec change against an earlier run.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+# Keep benchmark output away from the real results, caches and uploads. Settings are read at import
+# time, so this has to happen before the app is imported.
+BENCH_DIR = os.path.join(tempfile.gettempdir(), "elavia_bench")
+for _name in ("RESULTS_DIR", "CACHE_DIR", "UPLOAD_DIR"):
+    os.environ.setdefault(_name, os.path.join(BENCH_DIR, _name.split("_")[0].lower()))
+os.environ.setdefault("OCR_CACHE_ENABLED", "false")
+
+from bson import ObjectId  # noqa: E402
+
+from app.core.config import settings  # noqa: E402
+from app.core.events import event_bus  # noqa: E402
+from app.core.executor import run_in_thread, shutdown_executors  # noqa: E402
+from app.services.document_processor import run_pipeline  # noqa: E402
+from app.services.result_store import result_store  # noqa: E402
+from benchmarks.stub_engines import STUB_ENGINES, install_stub_engines  # noqa: E402
+from benchmarks.synthetic_pdfs import KINDS, synthetic_pdf  # noqa: E402
+
+STAGES = ("rasterize", "preprocess", "ocr", "parse", "persist")
+# Progress event -> stage its "seconds" belong to
+EVENT_STAGES = {
+    "rasterized": "rasterize",
+    "text_extracted": "rasterize",
+    "skipped": "rasterize",  # blank pages are rendered too before they are dropped
+    "preprocessed": "preprocess",
+    "ocr_done": "ocr",
+    "parsed": "parse",
+}
+
+
+class PeakRSS:
+    """Samples this process's resident set size in the background and keeps the maximum (MB)."""
+
+    def __init__(self, interval=0.005):
+        self.interval = interval
+        self.peak = 0.0
+        self._stop = threading.Event()
+        self._thread = None
+
+    @staticmethod
+    def current():
+        try:
+            with open("/proc/self/status") as f:
+                for line in f:
+                    if line.startswith("VmRSS:"):
+                        return int(line.split()[1]) / 1024
+        except OSError:
+            pass
+        # Not Linux: fall back to the lifetime peak
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+    def _sample(self):
+        while not self._stop.wait(self.interval):
+            self.peak = max(self.peak, self.current())
+
+    def __enter__(self):
+        self.peak = self.current()
+        self._thread = threading.Thread(target=self._sample, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        self.peak = max(self.peak, self.current())
+
+
+def tesseract_available():
+    try:
+        import pytesseract
+        pytesseract.pytesseract.tesseract_cmd = settings.TESSERACT_CMD
+        pytesseract.get_tesseract_version()
+        return True
+    except Exception:
+        return False
+
+
+def tesserocr_available():
+    try:
+        from app.services.tesserocr_service import TesserocrService
+        TesserocrService()
+        return True
+    except Exception:
+        return False
+
+
+async def run_case(kind, pages, engine, data_dir):
+    file_path = synthetic_pdf(kind, pages, data_dir)
+    doc_type = "question_paper" if kind == "digital" else "answer_sheet"
+    doc_id = str(ObjectId())
+    stages = {stage: 0.0 for stage in STAGES}
+    fast_path_pages = 0
+    blank_pages = 0
+
+    with event_bus.subscribe(doc_id, max_queue=0) as events, PeakRSS() as rss:
+        cpu_started, started = time.process_time(), time.perf_counter()
+        payload = await run_pipeline(doc_id, file_path, doc_type, engine, use_cache=settings.OCR_CACHE_ENABLED)
+        persist_started = time.perf_counter()
+        await run_in_thread(result_store.save, doc_id, payload)
+        stages["persist"] = time.perf_counter() - persist_started
+        wall, cpu = time.perf_counter() - started, time.process_time() - cpu_started
+
+    while not events.empty():
+        event = events.get_nowait()
+        stage = EVENT_STAGES.get(event["stage"])
+        if stage:
+            stages[stage] += event.get("seconds", 0.0)
+        fast_path_pages += event["stage"] == "text_extracted"
+        blank_pages += event["stage"] == "skipped"
+
+    return {
+        "kind": kind,
+        "pages": pages,
+        "engine": engine,
+        "doc_type": doc_type,
+        "stages_s": {stage: round(seconds, 4) for stage, seconds in stages.items()},
+        "wall_s": round(wall, 4),
+        "cpu_s": round(cpu, 4),
+        "peak_rss_mb": round(rss.peak, 1),
+        "pages_per_s": round(pages / wall, 2) if wall else None,
+        "text_layer_pages": fast_path_pages,
+        "blank_pages": blank_pages,
+        "questions": len(payload["parsed_result"]),
+    }
+
+
+def _git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except Exception:
+        return None
+
+
+def _case_key(case):
+    return case["kind"], case["pages"], case["engine"]
+
+
+def print_table(cases, baseline=None):
+    before = {_case_key(case): case for case in (baseline or [])}
+    header = f"{'kind':<12} {'pages':>5} {'engine':<10} " + " ".join(f"{s:>10}" for s in STAGES)
+    header += f" {'wall':>8} {'cpu':>8} {'rss MB':>8} {'pages/s':>8}"
+    if baseline is not None:
+        header += f" {'vs base':>8}"
+    print(header)
+    for case in cases:
+        row = f"{case['kind']:<12} {case['pages']:>5} {case['engine']:<10} "
+        row += " ".join(f"{case['stages_s'][s]:>10.3f}" for s in STAGES)
+        row += f" {case['wall_s']:>8.3f} {case['cpu_s']:>8.3f} {case['peak_rss_mb']:>8.1f} {case['pages_per_s']:>8.1f}"
+        if baseline is not None:
+            old = before.get(_case_key(case))
+            if old and old.get("pages_per_s"):
+                row += f" {(case['pages_per_s'] / old['pages_per_s'] - 1) * 100:>+7.1f}%"
+            else:
+                row += f" {'-':>8}"
+        print(row)
+
+
+async def run_benchmark(args):
+    engines = list(args.engines)
+    if "tesseract" in engines and not tesseract_available():
+        print("Tesseract is not installed; skipping it")
+        engines.remove("tesseract")
+    if "tesserocr" in engines and not tesserocr_available():
+        print("tesserocr is not installed; skipping it")
+        engines.remove("tesserocr")
+    install_stub_engines([name for name in engines if name in STUB_ENGINES], args.stub_latency)
+
+    cases = []
+    try:
+        for kind in args.kinds:
+            for pages in args.pages:
+                for engine in engines:
+                    print(f"Running {kind} x{pages} with {engine}...", flush=True)
+                    cases.append(await run_case(kind, pages, engine, args.data_dir))
+    finally:
+        shutdown_executors()
+    return cases
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the OCR pipeline on synthetic PDFs")
+    parser.add_argument("--kinds", nargs="+", choices=KINDS, default=list(KINDS))
+    parser.add_argument("--pages", type=int, nargs="+", default=[1, 10, 100])
+    parser.add_argument("--engines", nargs="+", choices=["tesseract", "tesserocr", *STUB_ENGINES],
+                        default=["tesseract", "tesserocr", "gemini", "qwen", "paddle", "surya"])
+    parser.add_argument("--stub-latency", type=float, default=0.05, help="seconds per page for stub engines")
+    parser.add_argument("--process-workers", type=int, default=0,
+                        help="OCR_PROCESS_WORKERS for Tesseract (0 keeps all work in this process, "
+                             "so CPU time covers it)")
+    parser.add_argument("--data-dir", default=os.path.join(BENCH_DIR, "pdfs"), help="where synthetic PDFs are cached")
+    parser.add_argument("--output", default="bench_pipeline.json", help="JSON results file")
+    parser.add_argument("--baseline", help="earlier JSON results to compare pages/sec against")
+    args = parser.parse_args()
+
+    settings.OCR_PROCESS_WORKERS = args.process_workers
+    cases = asyncio.run(run_benchmark(args))
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)["cases"]
+    print()
+    print_table(cases, baseline)
+
+    report = {
+        "meta": {
+            "commit": _git_commit(),
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "stub_latency_s": args.stub_latency,
+            "process_workers": args.process_workers,
+            "ocr_cache": settings.OCR_CACHE_ENABLED,
+            "text_layer_fast_path": settings.TEXT_LAYER_FAST_PATH,
+        },
+        "cases": cases,
+    }
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nWrote {args.output}")
+
+
+if __name__ == "__main__":
+    main()
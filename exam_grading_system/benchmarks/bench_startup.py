@@ -0,0 +1,74 @@
+"""
+API startup benchmark: imports the app in fresh interpreters and reports how long that takes.
+
+    python -m benchmarks.bench_startup --runs 3 --top 10
+
+Per run it measures the wall time of `import app.main` and the process's peak RSS afterwards, then
+lists the slowest top-level packages from `python -X importtime`. Engine SDKs (paddleocr, surya/torch,
+google.generativeai) are imported on first use, so they should not appear here.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+PROBE = """
+import json, sys, time
+started = time.perf_counter()
+import app.main
+elapsed = time.perf_counter() - started
+try:
+    import resource  # not available on Windows
+    rss_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+except ImportError:
+    rss_mb = None
+heavy = [name for name in ("google.generativeai", "paddleocr", "surya", "torch") if name in sys.modules]
+print(json.dumps({"import_s": elapsed, "rss_mb": rss_mb, "heavy_modules": heavy}))
+"""
+
+
+def run_probe():
+    result = subprocess.run([sys.executable, "-c", PROBE], capture_output=True, text=True, check=True)
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def slowest_imports(top):
+    """(cumulative seconds, package) of the slowest top-level imports, from -X importtime."""
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", "import app.main"],
+                            capture_output=True, text=True, check=True)
+    totals = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = (part.strip() for part in line.split(":", 1)[1].split("|"))
+        if not cumulative.isdigit():
+            continue
+        package = name.split(".")[0]
+        # Nested imports are indented; the outermost entry of a package carries its cumulative time
+        totals[package] = max(totals.get(package, 0), int(cumulative))
+    return sorted(((us / 1e6, package) for package, us in totals.items()), reverse=True)[:top]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark API import time and memory")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--top", type=int, default=10)
+    args = parser.parse_args()
+
+    env_note = f"python {sys.version.split()[0]}, cwd {os.getcwd()}"
+    print(f"Importing app.main in {args.runs} fresh interpreter(s) ({env_note})")
+    runs = [run_probe() for _ in range(args.runs)]
+    for i, run in enumerate(runs, 1):
+        heavy = ", ".join(run["heavy_modules"]) or "none"
+        rss = f"{run['rss_mb']:.0f} MB" if run["rss_mb"] is not None else "n/a"
+        print(f"run {i}: import {run['import_s']:.2f}s, peak RSS {rss}, engine SDKs loaded: {heavy}")
+    print(f"best: {min(run['import_s'] for run in runs):.2f}s")
+
+    print("\nSlowest top-level imports:")
+    for seconds, package in slowest_imports(args.top):
+        print(f"{package:<24} {seconds:>6.3f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""
+Tesseract backend benchmark: pytesseract (a tesseract process per page) against tesserocr (an
+in-process API handle per thread), page by page and in multi-page calls.
+
+    python -m benchmarks.bench_tesseract --kinds scanned digital --pages 8 --threads 1 4
+
+Pages are rendered from the synthetic PDFs with the engines' render profile (300 dpi grayscale).
+For each backend and thread count it reports pages/sec over all pages, the time of the very first
+page (process start or handle initialization included) and how closely its text matches pytesseract's.
+Backends that are not installed are skipped.
+"""
+import argparse
+import difflib
+import os
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import fitz
+import numpy as np
+
+from app.core.config import settings
+from benchmarks.synthetic_pdfs import synthetic_pdf
+
+DATA_DIR = os.path.join(tempfile.gettempdir(), "elavia_bench", "pdfs")
+
+
+def render_pages(kind, pages, dpi):
+    with fitz.open(synthetic_pdf(kind, pages, DATA_DIR)) as doc:
+        images = []
+        for page in doc:
+            pix = page.get_pixmap(dpi=dpi, colorspace=fitz.csGRAY)
+            images.append(np.frombuffer(pix.samples, dtype=np.uint8).reshape(pix.height, pix.width).copy())
+        return images
+
+
+def load_backends():
+    """name -> engine instance, for the backends that can run here."""
+    backends = {}
+    try:
+        import pytesseract
+        from app.services.tesseract_service import TesseractService
+        engine = TesseractService()
+        pytesseract.get_tesseract_version()
+        backends["pytesseract"] = engine
+    except Exception as exc:
+        print(f"pytesseract unavailable: {exc}")
+    try:
+        from app.services.tesserocr_service import TesserocrService
+        backends["tesserocr"] = TesserocrService()
+    except Exception as exc:
+        print(f"tesserocr unavailable: {exc}")
+    return backends
+
+
+def run_pages(engine, images, threads, batch):
+    """OCRs all images on `threads` threads, `batch` pages per call. Returns (texts, seconds)."""
+    chunks = [images[i:i + batch] for i in range(0, len(images), batch)]
+    if batch > 1:
+        call = lambda chunk: [page[0] for page in engine.extract_text_batch(chunk)]  # noqa: E731
+    else:
+        call = lambda chunk: [engine.extract_text(chunk[0])[0]]  # noqa: E731
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        texts = [text for chunk_texts in pool.map(call, chunks) for text in chunk_texts]
+    return texts, time.perf_counter() - started
+
+
+def similarity(texts, reference):
+    if reference is None:
+        return "-"
+    ratios = [difflib.SequenceMatcher(None, a, b).ratio() for a, b in zip(texts, reference)]
+    return f"{100 * sum(ratios) / len(ratios):.1f}%"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark pytesseract against in-process tesserocr")
+    parser.add_argument("--kinds", nargs="+", default=["scanned", "digital", "handwriting"])
+    parser.add_argument("--pages", type=int, default=8)
+    parser.add_argument("--threads", type=int, nargs="+", default=[1, os.cpu_count() or 4])
+    parser.add_argument("--batch", type=int, default=4, help="pages per tesserocr extract_text_batch() call")
+    args = parser.parse_args()
+
+    backends = load_backends()
+    if not backends:
+        print("No Tesseract backend is installed; nothing to benchmark")
+        return
+    dpi = settings.RENDER_PROFILES["tesseract"]["dpi"]
+
+    print(f"{'page':<12} {'backend':<22} {'threads':>7} {'pages/s':>8} {'first page s':>13} {'match':>7}")
+    for kind in args.kinds:
+        images = render_pages(kind, args.pages, dpi)
+
+        # Cold first page: a fresh tesseract process, or the first API handle on a new thread
+        first = {}
+        for name, engine in backends.items():
+            with ThreadPoolExecutor(max_workers=1) as pool:
+                started = time.perf_counter()
+                pool.submit(engine.extract_text, images[0]).result()
+                first[name] = time.perf_counter() - started
+
+        reference = None
+        runs = [("pytesseract", 1), ("tesserocr", 1), ("tesserocr", args.batch)]
+        for threads in args.threads:
+            for name, batch in runs:
+                if name not in backends:
+                    continue
+                texts, seconds = run_pages(backends[name], images, threads, batch)
+                if name == "pytesseract" and reference is None:
+                    reference = texts
+                label = name if batch == 1 else f"{name} x{batch}/call"
+                print(f"{kind:<12} {label:<22} {threads:>7} {len(images) / seconds:>8.2f} "
+                      f"{first[name]:>13.2f} {similarity(texts, reference):>7}")
+
+
+if __name__ == "__main__":
+    main()
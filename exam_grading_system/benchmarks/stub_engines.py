@@ -0,0 +1,63 @@
+"""
+Deterministic stand-ins for the engines that need models or API keys (Gemini, Qwen, Paddle, Surya).
+They return text derived from the page pixels after a fixed per-page latency, so the pipeline around
+them (rendering, preprocessing, scheduling, parsing) can be measured without the real engines.
+"""
+import asyncio
+import time
+
+from app.core.config import settings
+from app.services.engine_registry import engine_registry
+
+
+def _stub_text(image):
+    checksum = int(image[::16, ::16].sum()) % 100_000
+    lines = [
+        f"Ans 1 stub answer for page {image.shape[1]}x{image.shape[0]} checksum {checksum}",
+        "(a) first part of the answer",
+        "(b) second part of the answer",
+    ]
+    return "\n".join(lines), lines
+
+
+class StubEngine:
+    """Local engine (Paddle-like): blocks its worker thread for `latency` seconds per page."""
+    thread_safe = True
+    latency = 0.0
+
+    def extract_text(self, image):
+        time.sleep(self.latency)
+        return _stub_text(image)
+
+
+class StubBatchEngine(StubEngine):
+    """Engine with a batch API (Surya-like)."""
+
+    def extract_text_batch(self, images):
+        time.sleep(self.latency * len(images))
+        return [_stub_text(image) for image in images]
+
+
+class StubRemoteEngine(StubEngine):
+    """Remote VLM (Gemini/Qwen-like): awaits `latency` seconds per page on the event loop."""
+
+    async def extract_text_async(self, image):
+        await asyncio.sleep(self.latency)
+        return _stub_text(image)
+
+
+STUB_ENGINES = {
+    "gemini": StubRemoteEngine,
+    "qwen": StubRemoteEngine,
+    "paddle": StubEngine,
+    "surya": StubBatchEngine,
+}
+
+
+def install_stub_engines(names, latency):
+    """Replace the named engines in the registry with stubs taking `latency` seconds per page."""
+    for name in names:
+        base = STUB_ENGINES[name]
+        engine_registry.register(name, type(f"Stub{name.title()}Engine", (base,), {"latency": latency}))
+        # Stubs exist only in this process, so they must not be dispatched to the process pool
+        settings.ENGINE_EXECUTORS[name] = "thread"
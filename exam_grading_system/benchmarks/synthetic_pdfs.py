@@ -0,0 +1,109 @@
+"""
+Deterministic synthetic exam PDFs for the benchmarks, generated offline with fitz:
+1. digital     - born-digital question paper (real text layer)
+2. scanned     - the same kind of page, printed and scanned (noisy, slightly rotated image)
+3. handwriting - ruled notebook page with script-font "handwritten" answers (image only)
+4. booklet     - answer booklet: one answered handwriting page, then two blank ruled pages
+"""
+import os
+
+import cv2
+import fitz
+import numpy as np
+
+KINDS = ("digital", "scanned", "handwriting", "booklet")
+
+A4 = fitz.paper_rect("a4")
+SCAN_DPI = 150
+
+
+def _question_lines(page_no):
+    lines = [f"English Language & Literature - Page {page_no}", ""]
+    for q in range(1, 5):
+        q_no = (page_no - 1) * 4 + q
+        lines.append(f"{q_no}. Read the passage and answer the questions that follow in about 40 words.")
+        lines.append("(i) What does the poet compare the evening sky to, and why?")
+        lines.append("(ii) Identify the literary device used in the second stanza.")
+        lines.append("")
+    return lines
+
+
+def _answer_lines(page_no):
+    lines = []
+    for q in range(1, 4):
+        q_no = (page_no - 1) * 3 + q
+        lines.append(f"Ans {q_no} The poet compares the sky")
+        lines.append("to a canvas painted by the sun")
+        lines.append("(a) it shows the beauty of nature")
+    return lines
+
+
+def _digital_page(doc, page_no):
+    page = doc.new_page(width=A4.width, height=A4.height)
+    page.insert_textbox(A4 + (56, 56, -56, -56), "\n".join(_question_lines(page_no)), fontsize=11)
+    return page
+
+
+def _insert_image_page(doc, image):
+    page = doc.new_page(width=A4.width, height=A4.height)
+    ok, jpeg = cv2.imencode(".jpg", image, [cv2.IMWRITE_JPEG_QUALITY, 80])
+    page.insert_image(page.rect, stream=jpeg.tobytes())
+
+
+def _scanned_image(page_no, rng):
+    """A digital page rendered to grayscale, rotated a little and speckled like a flatbed scan."""
+    with fitz.open() as scratch:
+        pix = _digital_page(scratch, page_no).get_pixmap(dpi=SCAN_DPI, colorspace=fitz.csGRAY)
+        image = np.frombuffer(pix.samples, dtype=np.uint8).reshape(pix.height, pix.width).copy()
+    h, w = image.shape
+    rotation = cv2.getRotationMatrix2D((w / 2, h / 2), rng.uniform(-1.5, 1.5), 1.0)
+    image = cv2.warpAffine(image, rotation, (w, h), borderValue=255)
+    noise = rng.normal(0, 12, image.shape)
+    return np.clip(image.astype(np.float32) * 0.92 + 10 + noise, 0, 255).astype(np.uint8)
+
+
+def _handwriting_image(page_no, rng, answered=True):
+    """White notebook page with blue ruled lines and a margin, answers in a script font (unless left blank)."""
+    w, h = int(A4.width * SCAN_DPI / 72), int(A4.height * SCAN_DPI / 72)
+    image = np.full((h, w, 3), 250, dtype=np.uint8)
+    line_gap = 48
+    for y in range(160, h - 60, line_gap):
+        cv2.line(image, (0, y), (w, y), (220, 170, 140), 2)  # BGR light blue
+    cv2.line(image, (110, 0), (110, h), (120, 120, 230), 2)  # red margin
+
+    y = 160 - 10
+    for text in _answer_lines(page_no) if answered else []:
+        x = 130 + int(rng.integers(0, 30))
+        cv2.putText(image, text, (x, y + int(rng.integers(-3, 4))), cv2.FONT_HERSHEY_SCRIPT_SIMPLEX,
+                    1.1, (110, 40, 20), 2, cv2.LINE_AA)
+        y += line_gap * 2
+    return image
+
+
+def generate_pdf(kind, pages, path, seed=0):
+    """Writes a `pages`-page PDF of the given kind to path (same seed, same bytes)."""
+    rng = np.random.default_rng(seed)
+    doc = fitz.open()
+    for page_no in range(1, pages + 1):
+        if kind == "digital":
+            _digital_page(doc, page_no)
+        elif kind == "scanned":
+            _insert_image_page(doc, _scanned_image(page_no, rng))
+        elif kind == "handwriting":
+            _insert_image_page(doc, _handwriting_image(page_no, rng))
+        elif kind == "booklet":
+            _insert_image_page(doc, _handwriting_image(page_no, rng, answered=page_no % 3 == 1))
+        else:
+            raise ValueError(f"Unknown synthetic PDF kind '{kind}'")
+    doc.save(path, garbage=3, deflate=True)
+    doc.close()
+    return path
+
+
+def synthetic_pdf(kind, pages, data_dir):
+    """Path of a cached synthetic PDF, generating it on first use."""
+    os.makedirs(data_dir, exist_ok=True)
+    path = os.path.join(data_dir, f"{kind}_{pages}p.pdf")
+    if not os.path.exists(path):
+        generate_pdf(kind, pages, path)
+    return path
@@ -87,6 +87,7 @@ function setupFormHandler() {
         const fileInput = document.getElementById('fileInput');
         const docType = document.getElementById('docType').value;
         const ocrEngine = document.getElementById('ocrEngine').value;
+        const pageRange = document.getElementById('pageRange').value.trim();
         
         if(fileInput.files.length === 0) {
             alert("Please select a file!");
@@ -97,6 +98,9 @@ function setupFormHandler() {
         formData.append('file', fileInput.files[0]);
         formData.append('doc_type', docType);
         formData.append('ocr_engine', ocrEngine);
+        if (pageRange) {
+            formData.append('pages', pageRange);
+        }
 
         try {
             const response = await fetch('/api/upload', {
@@ -109,7 +113,7 @@ function setupFormHandler() {
             const data = await response.json();
             const docId = data.id;
             
-            pollResults(docId);
+            watchResults(docId);
             
         } catch (error) {
             alert("Error: " + error.message);
@@ -218,6 +222,7 @@ form.addEventListener('submit', async (e) => {
     const fileInput = document.getElementById('fileInput');
     const docType = document.getElementById('docType').value;
     const ocrEngine = document.getElementById('ocrEngine').value;
+    const pageRange = document.getElementById('pageRange').value.trim();
     
     if(fileInput.files.length === 0) {
         alert("Please select a file!");
@@ -228,6 +233,9 @@ form.addEventListener('submit', async (e) => {
     formData.append('file', fileInput.files[0]);
     formData.append('doc_type', docType);
     formData.append('ocr_engine', ocrEngine);
+    if (pageRange) {
+        formData.append('pages', pageRange);
+    }
 
     try {
         // 1. Upload File
@@ -241,8 +249,8 @@ form.addEventListener('submit', async (e) => {
         const data = await response.json();
         const docId = data.id;
         
-        // 2. Start Polling for Results
-        pollResults(docId);
+        // 2. Follow progress until the results are ready
+        watchResults(docId);
         
     } catch (error) {
         alert("Error: " + error.message);
@@ -250,25 +258,98 @@ form.addEventListener('submit', async (e) => {
     }
 });
 
+function watchResults(docId) {
+    // Progress is pushed over Server-Sent Events; fall back to polling without EventSource support
+    if (!window.EventSource) {
+        pollResults(docId);
+        return;
+    }
+
+    const source = new EventSource(`/api/results/${docId}/events`);
+    let pagesDone = 0;
+    let finished = false;
+
+    const finish = async () => {
+        finished = true;
+        source.close();
+        const full = await fetch(`/api/results/${docId}`);
+        displayResults(await full.json());
+    };
+
+    source.addEventListener('queued', () => {
+        loading.textContent = 'Queued... please wait.';
+    });
+    source.addEventListener('processing', () => {
+        loading.textContent = 'Processing... please wait.';
+    });
+    source.addEventListener('rasterized', (e) => {
+        const data = JSON.parse(e.data);
+        loading.textContent = `Rendered page ${data.page}, ${pagesDone} page(s) recognised...`;
+    });
+    source.addEventListener('ocr_done', (e) => {
+        const data = JSON.parse(e.data);
+        pagesDone += 1;
+        loading.textContent = `Recognised page ${data.page} with ${data.engine} in ${data.seconds.toFixed(1)}s (${pagesDone} done)...`;
+    });
+    source.addEventListener('text_extracted', (e) => {
+        const data = JSON.parse(e.data);
+        pagesDone += 1;
+        loading.textContent = `Read page ${data.page} from the PDF text layer (${pagesDone} done)...`;
+    });
+    source.addEventListener('skipped', (e) => {
+        const data = JSON.parse(e.data);
+        pagesDone += 1;
+        loading.textContent = `Skipped blank page ${data.page} (${pagesDone} done)...`;
+    });
+    source.addEventListener('resumed', (e) => {
+        const data = JSON.parse(e.data);
+        pagesDone += data.pages;
+        loading.textContent = `Resuming: ${data.pages} page(s) already done, ${data.pending} to go...`;
+    });
+    source.addEventListener('page_failed', (e) => {
+        const data = JSON.parse(e.data);
+        loading.textContent = `Page ${data.page} failed (${data.error}), continuing with the other pages...`;
+    });
+    source.addEventListener('retrying', () => {
+        loading.textContent = 'Temporary error, retrying shortly... please wait.';
+    });
+    source.addEventListener('parsed', () => {
+        loading.textContent = 'Parsing questions...';
+    });
+    source.addEventListener('completed', finish);
+    source.addEventListener('failed', finish);
+    source.addEventListener('not_found', () => {
+        finished = true;
+        source.close();
+        loading.textContent = 'This document no longer exists.';
+    });
+    source.onerror = () => {
+        // Connection dropped before a final event: continue by polling
+        if (finished) return;
+        source.close();
+        pollResults(docId);
+    };
+}
+
 async function pollResults(docId) {
     const interval = setInterval(async () => {
         try {
-            const res = await fetch(`/api/results/${docId}`);
+            // Poll the lightweight status endpoint; fetch the full result once, when it is done
+            const res = await fetch(`/api/results/${docId}/status`);
             const data = await res.json();
             
             // Update progress display
             if (data.status === 'processing') {
                 loading.textContent = 'Processing with ' + (data.ocr_engine || 'selected OCR engine') + '... please wait.';
             } else if (data.status === 'queued') {
-                loading.textContent = 'Queued... please wait.';
+                const position = data.queue && data.queue.position;
+                loading.textContent = position ? `Queued (position ${position})... please wait.` : 'Queued... please wait.';
             }
             
-            if (data.status === 'completed') {
+            if (data.status === 'completed' || data.status === 'failed') {
                 clearInterval(interval);
-                displayResults(data);
-            } else if (data.status === 'failed') {
-                clearInterval(interval);
-                displayResults(data);
+                const full = await fetch(`/api/results/${docId}`);
+                displayResults(await full.json());
             }
         } catch (e) {
             clearInterval(interval);
@@ -303,7 +384,8 @@ function displayResults(data) {
     
     // Show Raw Text
     if (data.raw_text_pages && data.raw_text_pages.length > 0) {
-        rawTextOutput.textContent = data.raw_text_pages.join('\n\n--- Page Break ---\n\n');
+        // Pages outside a requested page range are null
+        rawTextOutput.textContent = data.raw_text_pages.filter(page => page !== null).join('\n\n--- Page Break ---\n\n');
     } else {
         rawTextOutput.textContent = 'No raw text available.';
     }
@@ -340,7 +422,7 @@ function toggleJson() {
     }
 }
 
-function updateDashboard(files) {
+function updateDashboard(files, counts) {
     if (!dashboardContent) return;
     
     if (!files || files.length === 0) {
@@ -348,14 +430,16 @@ function updateDashboard(files) {
         return;
     }
 
-    // Count by status
-    const completed = files.filter(f => f.status === 'completed').length;
-    const failed = files.filter(f => f.status === 'failed').length;
-    const processing = files.filter(f => f.status === 'processing').length;
+    // Count by status (server-side totals cover every result, not just the loaded page)
+    const countStatus = (status) => counts ? (counts[status] || 0) : files.filter(f => f.status === status).length;
+    const completed = countStatus('completed');
+    const failed = countStatus('failed');
+    const processing = countStatus('processing');
+    const total = counts ? Object.values(counts).reduce((sum, n) => sum + n, 0) : files.length;
 
     let html = `
         <div style="margin: 12px 0; line-height: 1.8;">
-            <strong>Total Results:</strong> ${files.length}<br>
+            <strong>Total Results:</strong> ${total}<br>
             <strong style="color: #4caf50;">✓ Completed:</strong> ${completed}<br>
     `;
 
@@ -673,12 +757,24 @@ async function loadSavedResults(forceReload = false) {
     savedResultItems = [];
 
     try {
-        const response = await fetch('/api/saved-results');
-        if (!response.ok) {
-            throw new Error('Failed to load saved results');
-        }
-
-        const { files = [] } = await response.json();
+        // The endpoint is paginated; follow next_cursor so every saved result is listed
+        const files = [];
+        let counts;
+        let cursor = null;
+        do {
+            const params = new URLSearchParams({ limit: '1000' });
+            if (cursor) {
+                params.set('cursor', cursor);
+            }
+            const response = await fetch(`/api/saved-results?${params}`);
+            if (!response.ok) {
+                throw new Error('Failed to load saved results');
+            }
+            const page = await response.json();
+            files.push(...(page.files || []));
+            counts = page.counts;
+            cursor = page.next_cursor;
+        } while (cursor);
 
         if (!files.length) {
             savedResultsEmpty.style.display = 'block';
@@ -779,7 +875,7 @@ async function loadSavedResults(forceReload = false) {
         }
 
         // Update dashboard with stats
-        updateDashboard(files);
+        updateDashboard(files, counts);
 
         savedResultsLoaded = true;
     } catch (error) {
@@ -832,7 +928,8 @@ function displaySavedResult(data) {
 
     // Show Raw Text
     if (data.raw_text_pages && data.raw_text_pages.length > 0) {
-        rawTextOutput.textContent = data.raw_text_pages.join('\n\n--- Page Break ---\n\n');
+        // Pages outside a requested page range are null
+        rawTextOutput.textContent = data.raw_text_pages.filter(page => page !== null).join('\n\n--- Page Break ---\n\n');
     } else {
         rawTextOutput.textContent = 'No raw text available.';
     }